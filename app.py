@@ -1,15 +1,53 @@
-from flask import Flask, request, session, redirect, url_for, render_template, flash
-import boto3
-from werkzeug.security import generate_password_hash, check_password_hash
+import click
+from flask import Flask, request, session, redirect, url_for, render_template, flash, g
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import logging
+import math
 import os
 import uuid
 from dotenv import load_dotenv
 
+from appointments import (
+    EXPIRES_AT_ATTR,
+    MAX_COMPLETION_CHUNK_SIZE,
+    STATUS_COMPLETED,
+    STATUS_PENDING,
+    SUMMARY_NAMES,
+    SUMMARY_PROJECTION,
+    AppointmentArchived,
+    BookingConflict,
+    RESULT_FAILED,
+    SlotUnavailable,
+    booking_appointment_id,
+    complete_appointment,
+    complete_appointments,
+    create_appointment,
+    query_doctor_appointments_by_status,
+    status_sort_key,
+    summarize,
+)
+from archive import AppointmentArchiver, archive_store_from_url
+import bulk
+from aws_clients import AWSClientFactory, LazyProxy
+from cache import TTLCache
+from concurrency import FanOut
+from doctor_directory import DoctorDirectory
+from dynamo import batch_get, decode_cursor, encode_cursor, iter_items, query_page
+from hashing import HashingBusy, PasswordHasher
+from loaders import UserLoader
+from metrics import Instrumentation
+from rate_limit import RateLimit, RateLimited, RateLimiter, bucket_store_from_url
+from readiness import Readiness
+from page_cache import FragmentCache, PageCache, StaticAssetVersions
+from notifications import NotificationOutbox
+from resilience import GuardedReader, ReadUnavailable
+from schema import create_tables, table_definitions
+from search_index import SearchIndex
+from stats import empty_stats, get_stats, reconcile_stats
+from session_profile import cached_profile, store_profile
+from validation import build_user_item, user_validation_error
+
 # ----------------------------------------
 # Load environment variables
 # ----------------------------------------
@@ -25,17 +63,176 @@ app.secret_key = os.environ.get('SECRET_KEY', 'temporary_secret_key')  # consist
 # Application Configuration
 # ----------------------------------------
 
+# Instrumentation (/metrics); SLOW_REQUEST_MS > 0 enables the slow-request sampler
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', 1.0))
+
+instrumentation = Instrumentation(slow_request_ms=SLOW_REQUEST_MS, slow_sample_rate=SLOW_REQUEST_SAMPLE_RATE)
+instrumentation.init_app(app)
+
 # AWS Config
 AWS_REGION_NAME = os.environ.get('AWS_REGION_NAME', 'us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION_NAME)
-sns = boto3.client('sns', region_name=AWS_REGION_NAME)
+DYNAMODB_ENDPOINT_URL = os.environ.get('DYNAMODB_ENDPOINT_URL')  # e.g. DynamoDB Local or moto
+SNS_ENDPOINT_URL = os.environ.get('SNS_ENDPOINT_URL')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. MinIO for the archive
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 50))
+AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', 2))
+AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', 5))
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', 5))
+AWS_RETRY_MODE = os.environ.get('AWS_RETRY_MODE', 'adaptive')
+AWS_TCP_KEEPALIVE = os.environ.get('AWS_TCP_KEEPALIVE', 'True').lower() == 'true'
+
+# All DynamoDB/SNS access goes through this factory; clients are built on first use
+aws = AWSClientFactory(
+    region_name=AWS_REGION_NAME,
+    dynamodb_endpoint_url=DYNAMODB_ENDPOINT_URL,
+    sns_endpoint_url=SNS_ENDPOINT_URL,
+    s3_endpoint_url=S3_ENDPOINT_URL,
+    max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+    connect_timeout=AWS_CONNECT_TIMEOUT,
+    read_timeout=AWS_READ_TIMEOUT,
+    max_attempts=AWS_MAX_ATTEMPTS,
+    retry_mode=AWS_RETRY_MODE,
+    tcp_keepalive=AWS_TCP_KEEPALIVE
+)
+aws.add_client_hook(instrumentation.install_client)
+dynamodb = LazyProxy(aws.dynamodb)
 
 # DynamoDB Table Names
 USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'UsersTable')
 APPOINTMENTS_TABLE_NAME = os.environ.get('APPOINTMENTS_TABLE_NAME', 'AppointmentsTable')
+SLOTS_TABLE_NAME = os.environ.get('SLOTS_TABLE_NAME', 'SlotReservationsTable')
+STATS_TABLE_NAME = os.environ.get('STATS_TABLE_NAME', 'UserStatsTable')
+
+user_table = aws.lazy_table(USERS_TABLE_NAME)
+appointment_table = aws.lazy_table(APPOINTMENTS_TABLE_NAME)
+stats_table = aws.lazy_table(STATS_TABLE_NAME)
+slots_table = aws.lazy_table(SLOTS_TABLE_NAME)
+
+# Doctor directory cache (GSI on UsersTable partitioned by role)
+USERS_ROLE_INDEX = os.environ.get('USERS_ROLE_INDEX', 'RoleIndex')
+DOCTOR_CACHE_TTL = int(os.environ.get('DOCTOR_CACHE_TTL', 300))
+DOCTOR_CACHE_MAXSIZE = int(os.environ.get('DOCTOR_CACHE_MAXSIZE', 256))
+
+doctor_directory = DoctorDirectory(
+    user_table,
+    index_name=USERS_ROLE_INDEX,
+    ttl=DOCTOR_CACHE_TTL,
+    maxsize=DOCTOR_CACHE_MAXSIZE
+)
+
+# Appointment search index (owner_email + term_key)
+SEARCH_INDEX_TABLE_NAME = os.environ.get('SEARCH_INDEX_TABLE_NAME', 'SearchIndexTable')
+search_index = SearchIndex(aws.lazy_table(SEARCH_INDEX_TABLE_NAME))
+
+# Cold archive of old completed appointments (`flask archive-appointments`):
+# gzip JSON Lines under file://<dir> or s3://<bucket>/<prefix>, looked up by id
+# through ArchiveIndexTable; archived items get a TTL on AppointmentsTable
+ARCHIVE_INDEX_TABLE_NAME = os.environ.get('ARCHIVE_INDEX_TABLE_NAME', 'ArchiveIndexTable')
+ARCHIVE_STORAGE_URL = os.environ.get('ARCHIVE_STORAGE_URL', 'file://archive')
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+ARCHIVE_TTL_GRACE_DAYS = int(os.environ.get('ARCHIVE_TTL_GRACE_DAYS', 7))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 1000))
+ARCHIVE_CACHE_TTL = int(os.environ.get('ARCHIVE_CACHE_TTL', 3600))
+
+archiver = AppointmentArchiver(
+    archive_store_from_url(ARCHIVE_STORAGE_URL, s3_client=aws.s3),
+    aws.lazy_table(ARCHIVE_INDEX_TABLE_NAME),
+    appointment_table,
+    LazyProxy(aws.dynamodb_client),
+    APPOINTMENTS_TABLE_NAME,
+    slots_table_name=SLOTS_TABLE_NAME,
+    stats_table_name=STATS_TABLE_NAME,
+    search_index=search_index,
+    cache_ttl=ARCHIVE_CACHE_TTL
+)
+
+# Dashboard pagination
+APPOINTMENTS_PAGE_SIZE = int(os.environ.get('APPOINTMENTS_PAGE_SIZE', 20))
+APPOINTMENTS_MAX_PAGE_SIZE = int(os.environ.get('APPOINTMENTS_MAX_PAGE_SIZE', 100))
+
+# Doctor dashboard status partitions (GSI: doctor_email + status_date)
+DOCTOR_STATUS_INDEX = os.environ.get('DOCTOR_STATUS_INDEX', 'DoctorStatusIndex')
+DASHBOARD_COMPLETED_LIMIT = int(os.environ.get('DASHBOARD_COMPLETED_LIMIT', 10))
+
+# Bulk diagnosis (/bulk_diagnosis): appointments per request and per transaction
+BULK_DIAGNOSIS_MAX_ITEMS = int(os.environ.get('BULK_DIAGNOSIS_MAX_ITEMS', 100))
+# One transaction per chunk; capped so a chunk stays within TransactWriteItems' 100 actions
+BULK_DIAGNOSIS_CHUNK_SIZE = max(1, min(int(os.environ.get('BULK_DIAGNOSIS_CHUNK_SIZE', 25)), MAX_COMPLETION_CHUNK_SIZE))
+
+# Degraded mode for dashboard index reads (circuit breaker + last-good cache)
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 5))
+BREAKER_RESET_TIMEOUT = int(os.environ.get('BREAKER_RESET_TIMEOUT', 30))
+DEGRADED_CACHE_TTL = int(os.environ.get('DEGRADED_CACHE_TTL', 120))
+DEGRADED_CACHE_MAXSIZE = int(os.environ.get('DEGRADED_CACHE_MAXSIZE', 2048))
+
+guarded_reader = GuardedReader(
+    TTLCache(maxsize=DEGRADED_CACHE_MAXSIZE, ttl=DEGRADED_CACHE_TTL),
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=BREAKER_RESET_TIMEOUT
+)
+
+# Rendered page/fragment caches and content-hashed static URLs
+STATIC_PAGE_MAX_AGE = int(os.environ.get('STATIC_PAGE_MAX_AGE', 300))
+FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
+FRAGMENT_CACHE_MAXSIZE = int(os.environ.get('FRAGMENT_CACHE_MAXSIZE', 2048))
+STATIC_ASSET_MAX_AGE = int(os.environ.get('STATIC_ASSET_MAX_AGE', 31536000))
+
+page_cache = PageCache(max_age=STATIC_PAGE_MAX_AGE)
+fragment_cache = FragmentCache(ttl=FRAGMENT_CACHE_TTL, maxsize=FRAGMENT_CACHE_MAXSIZE)
+static_assets = StaticAssetVersions(app, max_age=STATIC_ASSET_MAX_AGE)
+
+# Serving mode: 'sync' (WSGI via app.run/gunicorn, the default) or 'async'
+# (ASGI via asgi.py), where a request's independent reads run concurrently
+SERVING_MODE = os.environ.get('SERVING_MODE', 'sync').lower()
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', 32))
+
+fanout = FanOut(
+    max_workers=FANOUT_WORKERS,
+    concurrent=SERVING_MODE == 'async',
+    wrappers=[instrumentation.propagate]
+)
+
+# Password hashing (process pool; method string sets the cost)
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', os.cpu_count() or 1))
+HASH_MAX_PENDING = int(os.environ.get('HASH_MAX_PENDING', 0)) or None
+
+password_hasher = PasswordHasher(
+    method=PASSWORD_HASH_METHOD,
+    workers=HASH_WORKERS,
+    max_pending=HASH_MAX_PENDING
+)
 
-user_table = dynamodb.Table(USERS_TABLE_NAME)
-appointment_table = dynamodb.Table(APPOINTMENTS_TABLE_NAME)
+# Login/registration throttling: token buckets per client IP and per target
+# email ("<attempts>/<seconds>"); memory:// is per process, redis:// is shared.
+# Behind a load balancer or reverse proxy every request arrives from the
+# proxy's address, so set TRUSTED_PROXY_HOPS to the number of proxies in front
+# of the app; the client IP is then taken from X-Forwarded-For. Leave it at 0
+# when the app is reachable directly, or clients could forge the header.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL', 'memory://')
+LOGIN_IP_LIMIT = os.environ.get('LOGIN_IP_LIMIT', '20/60')
+LOGIN_EMAIL_LIMIT = os.environ.get('LOGIN_EMAIL_LIMIT', '10/300')
+REGISTER_IP_LIMIT = os.environ.get('REGISTER_IP_LIMIT', '5/300')
+
+rate_limiter = RateLimiter(
+    bucket_store_from_url(RATE_LIMIT_STORAGE_URL),
+    [
+        RateLimit.parse('login_ip', LOGIN_IP_LIMIT),
+        RateLimit.parse('login_email', LOGIN_EMAIL_LIMIT),
+        RateLimit.parse('register_ip', REGISTER_IP_LIMIT),
+    ],
+    enabled=RATE_LIMIT_ENABLED,
+    on_decision=instrumentation.record_rate_limit
+)
+
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS, x_host=TRUSTED_PROXY_HOPS)
+
+# Seconds a cached session profile is trusted before it is re-read
+SESSION_PROFILE_MAX_AGE = int(os.environ.get('SESSION_PROFILE_MAX_AGE', 900))
 
 # SNS Config
 SNS_TOPIC_ARN = os.environ.get('arn:aws:sns:us-east-1:863518417312:MedTrack:558117e9-13b2-4a5e-9232-712e88efa37b')
@@ -47,6 +244,45 @@ SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL')
 SENDER_PASSWORD = os.environ.get('SENDER_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'True').lower() == 'true'
+
+# Notification outbox (background delivery)
+NOTIFY_WORKERS = int(os.environ.get('NOTIFY_WORKERS', 2))
+NOTIFY_QUEUE_SIZE = int(os.environ.get('NOTIFY_QUEUE_SIZE', 1000))
+NOTIFY_MAX_ATTEMPTS = int(os.environ.get('NOTIFY_MAX_ATTEMPTS', 5))
+NOTIFY_DEAD_LETTER_PATH = os.environ.get('NOTIFY_DEAD_LETTER_PATH')
+
+outbox = NotificationOutbox(
+    smtp_settings={
+        'host': SMTP_SERVER,
+        'port': SMTP_PORT,
+        'sender': SENDER_EMAIL,
+        'username': SENDER_EMAIL,
+        'password': SENDER_PASSWORD,
+        'starttls': SMTP_STARTTLS,
+    },
+    sns_client=aws.sns,
+    topic_arn=SNS_TOPIC_ARN,
+    workers=NOTIFY_WORKERS,
+    queue_size=NOTIFY_QUEUE_SIZE,
+    max_attempts=NOTIFY_MAX_ATTEMPTS,
+    dead_letter_path=NOTIFY_DEAD_LETTER_PATH,
+    on_delivery=instrumentation.record_notification
+)
+
+# Readiness (/health/ready): DynamoDB answers for the appointments table and
+# the table handles are built; create_app() runs the checks in the background
+READINESS_CACHE_TTL = int(os.environ.get('READINESS_CACHE_TTL', 10))
+
+readiness_checks = [
+    ('dynamodb', lambda: aws.dynamodb_client().describe_table(TableName=APPOINTMENTS_TABLE_NAME)),
+    ('tables', lambda: [aws.table(name) for name in (
+        USERS_TABLE_NAME, APPOINTMENTS_TABLE_NAME, STATS_TABLE_NAME, SEARCH_INDEX_TABLE_NAME
+    )]),
+]
+if ENABLE_SNS:
+    readiness_checks.append(('sns', aws.sns))
+readiness = Readiness(readiness_checks, ttl=READINESS_CACHE_TTL)
 
 # ----------------------------------------
 # Logging Configuration
@@ -69,47 +305,130 @@ def is_logged_in():
     return 'email' in session
 
 def send_email(to_email, subject, body):
-    """Send email using SMTP if enabled."""
+    """Queue an email for background delivery if enabled."""
     if not ENABLE_EMAIL:
         logger.info(f"[Email Skipped] Subject: {subject} to {to_email}")
         return
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_EMAIL
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.sendmail(SENDER_EMAIL, to_email, msg.as_string())
-        server.quit()
-
-        logger.info(f"Email sent to {to_email}")
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
+    outbox.send_email(to_email, subject, body)
 
 def publish_to_sns(message, subject="HealthCare Notification"):
-    """Publish a message to SNS if enabled."""
+    """Queue an SNS publish for background delivery if enabled."""
     if not ENABLE_SNS or not SNS_TOPIC_ARN:
         logger.info(f"[SNS Skipped] Message: {message}")
         return
+    outbox.publish(message, subject)
+
+def upgrade_password_hash(email, password):
+    """Re-hash a password stored with an older method or cost; failures are only logged."""
     try:
-        response = sns.publish(
-            TopicArn=SNS_TOPIC_ARN,
-            Message=message,
-            Subject=subject
+        user_table.update_item(
+            Key={'email': email},
+            UpdateExpression="SET password = :pw",
+            ExpressionAttributeValues={':pw': password_hasher.hash(password)}
         )
-        logger.info(f"SNS published: {response['MessageId']}")
+        logger.info(f"Upgraded password hash for {email}")
+    except Exception as e:
+        logger.warning(f"Password hash upgrade failed for {email}: {e}")
+
+def app_table_definitions():
+    """Table definitions using the configured table and index names."""
+    return table_definitions(
+        USERS_TABLE_NAME,
+        APPOINTMENTS_TABLE_NAME,
+        SEARCH_INDEX_TABLE_NAME,
+        SLOTS_TABLE_NAME,
+        STATS_TABLE_NAME,
+        ARCHIVE_INDEX_TABLE_NAME,
+        role_index=USERS_ROLE_INDEX,
+        doctor_status_index=DOCTOR_STATUS_INDEX
+    )
+
+def user_loader():
+    """Return the request-scoped user loader, creating it on first use."""
+    if 'user_loader' not in g:
+        g.user_loader = UserLoader(dynamodb, USERS_TABLE_NAME)
+    return g.user_loader
+
+def current_profile():
+    """Return the logged-in user's profile, reading UsersTable only when the session copy is missing or stale."""
+    profile = cached_profile(session, SESSION_PROFILE_MAX_AGE)
+    if profile is None:
+        user = user_loader().get(session['email'])
+        if not user:
+            return None
+        profile = store_profile(session, user)
+    return profile
+
+def index_for_search(item, previous=None):
+    """Update the search index for a written appointment; failures never fail the write."""
+    try:
+        search_index.index_appointment(item, previous=previous)
     except Exception as e:
-        logger.error(f"Failed to publish to SNS: {e}")
+        logger.error(f"Search indexing failed for {item.get('appointment_id')}: {e}")
+
+def guarded_read(index_name, label, fn, default):
+    """Run a dashboard index read in degraded mode; returns (result, degraded).
+
+    Throttles are retried, and while the index's breaker is open the user's
+    last good result is served. If there is none, ``default`` is returned
+    rather than falling back to a table scan.
+    """
+    cache_key = (label, session['email'], request.query_string)
+    try:
+        return guarded_reader.read(index_name, cache_key, fn)
+    except ReadUnavailable as e:
+        logger.warning(f"Dashboard read unavailable: {e}")
+        return default, True
+
+def get_page_size():
+    """Read the requested page size from the query string, clamped to the configured bounds."""
+    try:
+        page_size = int(request.args.get('page_size', APPOINTMENTS_PAGE_SIZE))
+    except ValueError:
+        page_size = APPOINTMENTS_PAGE_SIZE
+    return max(1, min(page_size, APPOINTMENTS_MAX_PAGE_SIZE))
+
+def query_appointments_page(index_name, key_attr, email):
+    """Fetch one page of a user's appointment summaries, newest first.
+
+    The page is bounded by ``page_size`` and resumed from the signed ``cursor``
+    query argument; optional ``from``/``to`` dates narrow the range on the
+    ``appointment_date`` sort key. Returns (items, next_cursor).
+    """
+    key_condition = "#pk = :email"
+    expr_values = {":email": email}
+    date_from = request.args.get('from', '').strip()
+    date_to = request.args.get('to', '').strip()
+    if date_from and date_to:
+        key_condition += " AND appointment_date BETWEEN :start AND :end"
+        expr_values[":start"] = date_from
+        expr_values[":end"] = date_to + '~'
+    elif date_from:
+        key_condition += " AND appointment_date >= :start"
+        expr_values[":start"] = date_from
+    elif date_to:
+        key_condition += " AND appointment_date <= :end"
+        expr_values[":end"] = date_to + '~'
+
+    start_key = decode_cursor(request.args.get('cursor'), app.secret_key)
+    items, last_key = query_page(
+        appointment_table.query,
+        get_page_size(),
+        start_key=start_key,
+        IndexName=index_name,
+        KeyConditionExpression=key_condition,
+        ProjectionExpression=SUMMARY_PROJECTION,
+        ExpressionAttributeNames=dict(SUMMARY_NAMES, **{"#pk": key_attr}),
+        ExpressionAttributeValues=expr_values,
+        ScanIndexForward=False
+    )
+    return summarize(items), encode_cursor(last_key, app.secret_key)
 
 @app.route('/')
 def index():
     if is_logged_in():
         return redirect(url_for('dashboard'))
-    return render_template('index.html')
+    return page_cache.render('index.html')
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -117,33 +436,24 @@ def register():
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST':
-        required_fields = ['name', 'email', 'password', 'confirm_password', 'age', 'gender', 'role']
-        for field in required_fields:
-            if not request.form.get(field):
-                flash(f'Please enter {field}', 'danger')
-                return render_template('register.html')
-
-        if request.form['password'] != request.form['confirm_password']:
-            flash('Passwords do not match', 'danger')
+        rate_limiter.hit(('register_ip', request.remote_addr))
+        error = user_validation_error(request.form)
+        if error:
+            flash(error, 'danger')
             return render_template('register.html')
 
         email = request.form['email'].lower()
-        existing = user_table.get_item(Key={'email': email}).get('Item')
+        existing = user_loader().get(email)
         if existing:
             flash('Email already registered', 'danger')
             return render_template('register.html')
 
-        user_data = {
-            'email': email,
-            'name': request.form['name'],
-            'password': generate_password_hash(request.form['password']),
-            'age': request.form['age'],
-            'gender': request.form['gender'],
-            'role': request.form['role'].lower(),
-            'created_at': datetime.utcnow().isoformat()
-        }
+        user_data = build_user_item(request.form, password_hasher.hash(request.form['password']))
 
         user_table.put_item(Item=user_data)
+        user_loader().forget(email)
+        if user_data['role'] == 'doctor':
+            doctor_directory.invalidate()
 
         # Email and SNS notification
         if ENABLE_EMAIL:
@@ -170,11 +480,16 @@ def login():
             flash('All fields are required', 'danger')
             return render_template('login.html')
 
-        user = user_table.get_item(Key={'email': email}).get('Item')
-        if user and user['role'] == role and check_password_hash(user['password'], password):
+        # Throttle before the user lookup and the password hash
+        rate_limiter.hit(('login_ip', request.remote_addr), ('login_email', email))
+
+        user = user_loader().get(email)
+        if user and user['role'] == role and password_hasher.verify(user['password'], password):
+            if password_hasher.needs_rehash(user['password']):
+                upgrade_password_hash(email, password)
             session['email'] = email
             session['role'] = role
-            session['name'] = user.get('name', '')
+            store_profile(session, user)
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
         flash('Invalid email, password, or role', 'danger')
@@ -199,59 +514,116 @@ def dashboard():
     role = session['role']
 
     try:
-        if role == 'doctor':
-            appointments = []
+        def read_stats():
+            # Header counters: one get_item on the precomputed stats, however long the history
+            return guarded_read(STATS_TABLE_NAME, 'stats', lambda: get_stats(stats_table, email), empty_stats())
+
+        def read_doctors():
             try:
-                response = appointment_table.query(
-                    IndexName='DoctorEmailIndex',
-                    KeyConditionExpression="doctor_email = :email",
-                    ExpressionAttributeValues={":email": email}
-                )
-                appointments = response.get('Items', [])
+                return doctor_directory.list_doctors()
             except Exception as e:
-                logger.warning(f"GSI not working for doctor: {e}")
-                # fallback
-                scan_response = appointment_table.scan(
-                    FilterExpression="#de = :email",
-                    ExpressionAttributeNames={"#de": "doctor_email"},
-                    ExpressionAttributeValues={":email": email}
+                logger.error(f"Failed to fetch doctors: {e}")
+                return None
+
+        if role == 'patient':
+            (stats, stats_degraded), doctors = fanout.gather(read_stats, read_doctors)
+        else:
+            stats, stats_degraded = read_stats()
+        if stats_degraded:
+            flash('Appointment counts may be out of date right now.', 'warning')
+
+        # Appointment lists are cached per user and data version: any booking or
+        # completion bumps data_version, so a hit skips the queries and the render
+        fragment_key = (role, email, stats['data_version'], request.query_string)
+        appointments_html = None if stats_degraded else fragment_cache.get(fragment_key)
+
+        if role == 'doctor':
+            if appointments_html is None:
+                # The page plus pending (soonest first) and recently completed,
+                # each one narrow query; independent, so fanned out together
+                page, pending, completed = fanout.gather(
+                    lambda: guarded_read(
+                        'DoctorEmailIndex', 'doctor_page',
+                        lambda: query_appointments_page('DoctorEmailIndex', 'doctor_email', email),
+                        ([], None)
+                    ),
+                    lambda: guarded_read(
+                        DOCTOR_STATUS_INDEX, 'doctor_pending',
+                        lambda: query_doctor_appointments_by_status(
+                            appointment_table, DOCTOR_STATUS_INDEX, email, STATUS_PENDING,
+                            limit=get_page_size()
+                        ),
+                        []
+                    ),
+                    lambda: guarded_read(
+                        DOCTOR_STATUS_INDEX, 'doctor_completed',
+                        lambda: query_doctor_appointments_by_status(
+                            appointment_table, DOCTOR_STATUS_INDEX, email, STATUS_COMPLETED,
+                            limit=DASHBOARD_COMPLETED_LIMIT, newest_first=True
+                        ),
+                        []
+                    )
+                )
+                (appointments, next_cursor), page_degraded = page
+                pending_appointments, pending_degraded = pending
+                completed_appointments, completed_degraded = completed
+
+                degraded = page_degraded or pending_degraded or completed_degraded
+                if degraded:
+                    flash('Some appointment data may be out of date or unavailable right now.', 'warning')
+
+                appointments_html = fragment_cache.render(
+                    fragment_key,
+                    '_doctor_appointments.html',
+                    store=not (degraded or stats_degraded),
+                    all_appointments=appointments,
+                    pending_appointments=pending_appointments,
+                    completed_appointments=completed_appointments,
+                    next_cursor=next_cursor
                 )
-                appointments = scan_response.get('Items', [])
 
-            return render_template('dashboard_doctor.html', appointments=appointments)
+            return render_template(
+                'dashboard_doctor.html',
+                appointments_html=appointments_html,
+                pending_count=stats['pending_count'],
+                completed_count=stats['completed_count'],
+                total_count=stats['total_count']
+            )
 
         elif role == 'patient':
-            appointments = []
-            try:
-                response = appointment_table.query(
-                    IndexName='PatientEmailIndex',
-                    KeyConditionExpression="patient_email = :email",
-                    ExpressionAttributeValues={":email": email}
+            if appointments_html is None:
+                (appointments, next_cursor), degraded = guarded_read(
+                    'PatientEmailIndex', 'patient_page',
+                    lambda: query_appointments_page('PatientEmailIndex', 'patient_email', email),
+                    ([], None)
                 )
-                appointments = response.get('Items', [])
-            except Exception as e:
-                logger.warning(f"GSI not working for patient: {e}")
-                # fallback
-                scan_response = appointment_table.scan(
-                    FilterExpression="#pe = :email",
-                    ExpressionAttributeNames={"#pe": "patient_email"},
-                    ExpressionAttributeValues={":email": email}
+                if degraded:
+                    flash('Your appointment list may be out of date or unavailable right now.', 'warning')
+
+                appointments_html = fragment_cache.render(
+                    fragment_key,
+                    '_patient_appointments.html',
+                    store=not (degraded or stats_degraded),
+                    appointments=appointments,
+                    next_cursor=next_cursor
                 )
-                appointments = scan_response.get('Items', [])
 
-            # Fetch list of doctors to display in booking modal
-            try:
-                doctors_response = user_table.scan(
-                    FilterExpression="#r = :doc",
-                    ExpressionAttributeNames={"#r": "role"},
-                    ExpressionAttributeValues={":doc": "doctor"}
+            # Doctor cards are the same for every patient; cached per directory reload
+            cards_key = ('doctor_cards', doctor_directory.generation)
+            doctor_cards_html = fragment_cache.get(cards_key) if doctors is not None else None
+            if doctor_cards_html is None:
+                doctor_cards_html = fragment_cache.render(
+                    cards_key, '_doctor_cards.html', store=doctors is not None, doctors=doctors or []
                 )
-                doctors = doctors_response.get('Items', [])
-            except Exception as e:
-                logger.error(f"Failed to fetch doctors: {e}")
-                doctors = []
 
-            return render_template('dashboard_patient.html', appointments=appointments, doctors=doctors)
+            return render_template(
+                'dashboard_patient.html',
+                appointments_html=appointments_html,
+                doctor_cards_html=doctor_cards_html,
+                pending_appointments=stats['pending_count'],
+                completed_appointments=stats['completed_count'],
+                total_appointments=stats['total_count']
+            )
 
         else:
             flash('Invalid role.', 'danger')
@@ -273,16 +645,26 @@ def book_appointment():
         doctor_email = request.form.get('doctor_email')
         symptoms = request.form.get('symptoms')
         appointment_date = request.form.get('appointment_date') or datetime.now().isoformat()
+        appointment_time = request.form.get('appointment_time')
+        if appointment_time and 'T' not in appointment_date:
+            appointment_date = f"{appointment_date}T{appointment_time}"
         patient_email = session.get('email')
+        # Issued with the form; a resubmission carries the same key
+        idempotency_key = request.form.get('idempotency_key', '').strip()[:128] or str(uuid.uuid4())
 
         if not doctor_email or not symptoms:
             flash('Please fill all required fields.', 'danger')
             return redirect(url_for('book_appointment'))
 
         try:
-            # Fetch doctor and patient info
-            doctor = user_table.get_item(Key={'email': doctor_email}).get('Item')
-            patient = user_table.get_item(Key={'email': patient_email}).get('Item')
+            # Patient details come from the session profile; when that copy is
+            # stale both users are fetched together in one BatchGetItem
+            loader = user_loader()
+            loader.prime(doctor_email)
+            if cached_profile(session, SESSION_PROFILE_MAX_AGE) is None:
+                loader.prime(patient_email)
+            patient = current_profile()
+            doctor = loader.get(doctor_email)
 
             if not doctor or doctor.get('role') != 'doctor':
                 flash('Invalid doctor selected.', 'danger')
@@ -295,8 +677,8 @@ def book_appointment():
             doctor_name = doctor.get('name', 'Doctor')
             patient_name = patient.get('name', 'Patient')
 
-            # Generate appointment
-            appointment_id = str(uuid.uuid4())
+            # Generate appointment (id is derived from the idempotency key)
+            appointment_id = booking_appointment_id(patient_email, idempotency_key)
             appointment_item = {
                 'appointment_id': appointment_id,
                 'doctor_email': doctor_email,
@@ -304,12 +686,23 @@ def book_appointment():
                 'patient_email': patient_email,
                 'patient_name': patient_name,
                 'symptoms': symptoms,
-                'status': 'pending',
+                'status': STATUS_PENDING,
                 'appointment_date': appointment_date,
+                'status_date': status_sort_key(STATUS_PENDING, appointment_date),
                 'created_at': datetime.now().isoformat()
             }
 
-            appointment_table.put_item(Item=appointment_item)
+            # Conditional write + doctor slot reservation in one transaction
+            appointment_item, created = create_appointment(
+                aws.dynamodb_client(), APPOINTMENTS_TABLE_NAME, SLOTS_TABLE_NAME, appointment_item,
+                stats_table_name=STATS_TABLE_NAME
+            )
+            if not created:
+                logger.info(f"Duplicate booking submission for {appointment_id}")
+                flash('This appointment was already booked.', 'info')
+                return redirect(url_for('view_appointment', appointment_id=appointment_id))
+
+            index_for_search(appointment_item)
 
             # Send email notifications
             if ENABLE_EMAIL:
@@ -325,19 +718,22 @@ def book_appointment():
                 )
 
             # SNS Notification
-            if ENABLE_SNS and SNS_TOPIC_ARN:
-                try:
-                    sns.publish(
-                        TopicArn=SNS_TOPIC_ARN,
-                        Message=f"New appointment booked by {patient_name} with Dr. {doctor_name} for {appointment_date}",
-                        Subject="New Appointment - MedTrack"
-                    )
-                except Exception as sns_err:
-                    logger.warning(f"SNS publish failed: {sns_err}")
+            publish_to_sns(
+                f"New appointment booked by {patient_name} with Dr. {doctor_name} for {appointment_date}",
+                subject="New Appointment - MedTrack"
+            )
 
             flash('Appointment booked successfully.', 'success')
             return redirect(url_for('dashboard'))
 
+        except SlotUnavailable:
+            flash('That time slot is already taken. Please choose another time.', 'warning')
+            return redirect(url_for('book_appointment'))
+
+        except BookingConflict:
+            flash('The doctor is being booked by others right now. Please try again.', 'warning')
+            return redirect(url_for('book_appointment'))
+
         except Exception as e:
             logger.error(f"Appointment booking failed: {e}")
             flash('An error occurred while booking the appointment.', 'danger')
@@ -345,17 +741,12 @@ def book_appointment():
 
     # GET Request – show doctor list
     try:
-        response = user_table.scan(
-            FilterExpression="#r = :doc",
-            ExpressionAttributeNames={"#r": "role"},
-            ExpressionAttributeValues={":doc": "doctor"}
-        )
-        doctors = response.get('Items', [])
+        doctors = doctor_directory.list_doctors()
     except Exception as e:
         logger.error(f"Doctor fetch failed: {e}")
         doctors = []
 
-    return render_template('book_appointment.html', doctors=doctors)
+    return render_template('book_appointment.html', doctors=doctors, idempotency_key=str(uuid.uuid4()))
 
 #view_appointment route
 @app.route('/view_appointment/<appointment_id>', methods=['GET', 'POST'])
@@ -367,6 +758,11 @@ def view_appointment(appointment_id):
     try:
         response = appointment_table.get_item(Key={'appointment_id': appointment_id})
         appointment = response.get('Item')
+        # A TTL-stamped item is already archived, just not yet deleted by TTL
+        archived = bool(appointment) and EXPIRES_AT_ATTR in appointment
+        if not appointment:
+            appointment = archiver.find(appointment_id)
+            archived = appointment is not None
 
         if not appointment:
             flash('Appointment not found.', 'danger')
@@ -383,6 +779,10 @@ def view_appointment(appointment_id):
             flash('Access denied: Not your appointment.', 'danger')
             return redirect(url_for('dashboard'))
 
+        if request.method == 'POST' and archived:
+            flash('This appointment has been archived and can no longer be edited.', 'warning')
+            return redirect(url_for('dashboard'))
+
         # Handle diagnosis submission
         if request.method == 'POST' and user_role == 'doctor':
             diagnosis = request.form.get('diagnosis', '').strip()
@@ -391,20 +791,28 @@ def view_appointment(appointment_id):
 
             if not diagnosis or not treatment_plan:
                 flash('Diagnosis and treatment plan are required.', 'danger')
-                return render_template('view_appointment_doctor.html', appointment=appointment)
-
-            # Update appointment with diagnosis
-            appointment_table.update_item(
-                Key={'appointment_id': appointment_id},
-                UpdateExpression="SET diagnosis = :diag, treatment_plan = :tp, prescription = :pres, #s = :status, updated_at = :now",
-                ExpressionAttributeNames={'#s': 'status'},
-                ExpressionAttributeValues={
-                    ':diag': diagnosis,
-                    ':tp': treatment_plan,
-                    ':pres': prescription,
-                    ':status': 'completed',
-                    ':now': datetime.now().isoformat()
-                }
+                return render_template('view_appointment_doctor.html', appointment=appointment, archived=archived)
+
+            # Update appointment with diagnosis (and the pending/completed counters)
+            try:
+                complete_appointment(
+                    aws.dynamodb_client(),
+                    APPOINTMENTS_TABLE_NAME,
+                    appointment,
+                    {
+                        'diagnosis': diagnosis,
+                        'treatment_plan': treatment_plan,
+                        'prescription': prescription,
+                        'updated_at': datetime.now().isoformat()
+                    },
+                    stats_table_name=STATS_TABLE_NAME
+                )
+            except AppointmentArchived:
+                flash('This appointment has been archived and can no longer be edited.', 'warning')
+                return redirect(url_for('dashboard'))
+            index_for_search(
+                dict(appointment, diagnosis=diagnosis, status=STATUS_COMPLETED),
+                previous=appointment
             )
 
             # Send email to patient
@@ -428,73 +836,233 @@ Thank you for using MedTrack."""
 
         # Render appropriate template
         template = 'view_appointment_doctor.html' if user_role == 'doctor' else 'view_appointment_patient.html'
-        return render_template(template, appointment=appointment)
+        return render_template(template, appointment=appointment, archived=archived)
 
     except Exception as e:
         logger.error(f"Error in view_appointment: {e}")
         flash('An error occurred. Please try again.', 'danger')
         return redirect(url_for('dashboard'))
 
-#search_appointments route
-@app.route('/search_appointments', methods=['GET', 'POST'])
-def search_appointments():
+# Fields a bulk diagnosis may set, and what it needs to know about each appointment
+DIAGNOSIS_FIELDS = ('diagnosis', 'treatment_plan', 'prescription')
+BULK_DIAGNOSIS_PROJECTION = ('appointment_id, doctor_email, doctor_name, patient_email, patient_name, '
+                             f"appointment_date, symptoms, diagnosis, #st, {EXPIRES_AT_ATTR}")
+
+def read_bulk_diagnoses():
+    """Return submitted (appointment_id, fields) pairs, or None if the payload is malformed.
+
+    Accepts JSON (``{"diagnoses": [{"appointment_id": ..., "diagnosis": ...}, ...]}``)
+    or the bulk form, where rows the doctor left empty are skipped.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        entries = payload.get('diagnoses') if isinstance(payload, dict) else None
+        if not isinstance(entries, list):
+            return None
+        entries = [entry if isinstance(entry, dict) else {} for entry in entries]
+        return [
+            (str(entry.get('appointment_id') or '').strip(),
+             {field: str(entry.get(field) or '').strip() for field in DIAGNOSIS_FIELDS})
+            for entry in entries
+        ]
+    submitted = []
+    for appointment_id in request.form.getlist('appointment_id'):
+        fields = {field: request.form.get(f"{field}-{appointment_id}", '').strip() for field in DIAGNOSIS_FIELDS}
+        if any(fields.values()):
+            submitted.append((appointment_id, fields))
+    return submitted
+
+def apply_bulk_diagnoses(doctor_email, entries):
+    """Validate, authorize and apply a doctor's diagnoses; returns one result dict per entry.
+
+    Ownership of every appointment is checked with one batch read, the writes
+    go out in chunked transactions (with the counters), and each patient
+    gets a single email covering all of their completed appointments.
+    """
+    results = [{'appointment_id': appointment_id, 'result': None, 'error': None} for appointment_id, _ in entries]
+    seen = set()
+    for result, (appointment_id, fields) in zip(results, entries):
+        if not appointment_id:
+            result['error'] = 'Appointment id is required.'
+        elif appointment_id in seen:
+            result['error'] = 'Duplicate appointment.'
+        elif not fields['diagnosis'] or not fields['treatment_plan']:
+            result['error'] = 'Diagnosis and treatment plan are required.'
+        seen.add(appointment_id)
+
+    found = batch_get(
+        dynamodb,
+        APPOINTMENTS_TABLE_NAME,
+        [{'appointment_id': r['appointment_id']} for r in results if not r['error']],
+        projection=BULK_DIAGNOSIS_PROJECTION,
+        expression_names={'#st': 'status'}
+    )
+    by_id = {item['appointment_id']: item for item in found}
+
+    completions = []
+    updated_at = datetime.now().isoformat()
+    for result, (appointment_id, fields) in zip(results, entries):
+        if result['error']:
+            continue
+        appointment = by_id.get(appointment_id)
+        if not appointment:
+            result['error'] = 'Appointment not found.'
+        elif appointment['doctor_email'] != doctor_email:
+            result['error'] = 'Access denied: Not your appointment.'
+        elif EXPIRES_AT_ATTR in appointment:
+            result['error'] = 'This appointment has been archived and can no longer be edited.'
+        else:
+            completions.append((appointment, dict(fields, updated_at=updated_at)))
+    for result in results:
+        if result['error']:
+            result['result'] = 'rejected'
+
+    outcomes = complete_appointments(
+        aws.dynamodb_client(),
+        APPOINTMENTS_TABLE_NAME,
+        completions,
+        stats_table_name=STATS_TABLE_NAME,
+        chunk_size=BULK_DIAGNOSIS_CHUNK_SIZE
+    )
+    applied = []
+    for result in results:
+        if result['appointment_id'] in outcomes and not result['result']:
+            result['result'], result['error'] = outcomes[result['appointment_id']]
+    for appointment, updates in completions:
+        if outcomes[appointment['appointment_id']][0] != RESULT_FAILED:
+            applied.append((appointment, updates))
+
+    try:
+        search_index.index_appointments([
+            (dict(appointment, diagnosis=updates['diagnosis'], status=STATUS_COMPLETED), appointment)
+            for appointment, updates in applied
+        ])
+    except Exception as e:
+        logger.error(f"Search indexing failed for bulk diagnosis by {doctor_email}: {e}")
+
+    if ENABLE_EMAIL:
+        by_patient = {}
+        for appointment, updates in applied:
+            by_patient.setdefault(appointment['patient_email'], []).append((appointment, updates))
+        for patient_email, visits in by_patient.items():
+            patient_name = visits[0][0].get('patient_name', 'Patient')
+            summaries = '\n\n'.join(
+                f"Appointment on {appointment['appointment_date'][:10]} with Dr. "
+                f"{appointment.get('doctor_name', 'Your Doctor')}\n"
+                f"Diagnosis: {updates['diagnosis']}\n"
+                f"Treatment Plan: {updates['treatment_plan']}"
+                for appointment, updates in visits
+            )
+            send_email(patient_email, "Your Appointment Diagnosis",
+                       f"Dear {patient_name},\n\n{summaries}\n\nThank you for using MedTrack.")
+
+    logger.info(f"Bulk diagnosis by {doctor_email}: {len(applied)} of {len(entries)} applied")
+    return results
+
+@app.route('/bulk_diagnosis', methods=['GET', 'POST'])
+def bulk_diagnosis():
+    wants_json = request.is_json
     if not is_logged_in():
+        if wants_json:
+            return {'error': 'Please log in to continue.'}, 401
         flash('Please log in to continue.', 'danger')
         return redirect(url_for('login'))
+    if session.get('role') != 'doctor':
+        if wants_json:
+            return {'error': 'Only doctors can submit diagnoses.'}, 403
+        flash('Only doctors can submit diagnoses.', 'danger')
+        return redirect(url_for('dashboard'))
 
-    if request.method == 'POST':
-        search_term = request.form.get('search_term', '').strip()
+    email = session['email']
+    try:
+        results = None
+        if request.method == 'POST':
+            entries = read_bulk_diagnoses()
+            if entries is None or len(entries) > BULK_DIAGNOSIS_MAX_ITEMS:
+                error = f"Submit between 1 and {BULK_DIAGNOSIS_MAX_ITEMS} diagnoses as a \"diagnoses\" list."
+                if wants_json:
+                    return {'error': error}, 400
+                flash(error, 'danger')
+                return redirect(url_for('bulk_diagnosis'))
+            if not entries:
+                if wants_json:
+                    return {'results': [], 'summary': {}}, 200
+                flash('Enter a diagnosis and treatment plan for at least one appointment.', 'warning')
+                return redirect(url_for('bulk_diagnosis'))
+
+            results = apply_bulk_diagnoses(email, entries)
+            summary = {}
+            for result in results:
+                summary[result['result']] = summary.get(result['result'], 0) + 1
+            if wants_json:
+                return {'results': results, 'summary': summary}, 200
+            flash(', '.join(f"{count} {outcome}" for outcome, count in sorted(summary.items())),
+                  'success' if set(summary) <= {'completed', 'updated'} else 'warning')
+
+        pending = query_doctor_appointments_by_status(
+            appointment_table, DOCTOR_STATUS_INDEX, email, STATUS_PENDING, limit=BULK_DIAGNOSIS_MAX_ITEMS
+        )
+        return render_template('bulk_diagnosis.html', appointments=pending, results=results)
 
-        if not search_term:
-            flash('Please enter a search term.', 'warning')
-            return redirect(url_for('dashboard'))
+    except Exception as e:
+        logger.error(f"Error in bulk_diagnosis: {e}")
+        if wants_json:
+            return {'error': 'An error occurred. Please try again.'}, 500
+        flash('An error occurred. Please try again.', 'danger')
+        return redirect(url_for('dashboard'))
 
-        try:
-            user_email = session['email']
-            role = session['role']
-            appointments = []
-
-            if role == 'doctor':
-                # Search patients by name
-                response = appointment_table.scan(
-                    FilterExpression="#doctor_email = :email AND contains(#patient_name, :term)",
-                    ExpressionAttributeNames={
-                        "#doctor_email": "doctor_email",
-                        "#patient_name": "patient_name"
-                    },
-                    ExpressionAttributeValues={
-                        ":email": user_email,
-                        ":term": search_term
-                    }
-                )
-            else:
-                # Search by doctor name or appointment status
-                response = appointment_table.scan(
-                    FilterExpression="#patient_email = :email AND (contains(#doctor_name, :term) OR contains(#status, :term))",
-                    ExpressionAttributeNames={
-                        "#patient_email": "patient_email",
-                        "#doctor_name": "doctor_name",
-                        "#status": "status"
-                    },
-                    ExpressionAttributeValues={
-                        ":email": user_email,
-                        ":term": search_term
-                    }
-                )
+#search_appointments route
+@app.route('/search_appointments', methods=['GET', 'POST'])
+def search_appointments():
+    if not is_logged_in():
+        flash('Please log in to continue.', 'danger')
+        return redirect(url_for('login'))
 
-            appointments = response.get('Items', [])
+    search_term = request.values.get('search_term', '').strip()
+    if request.method == 'GET' and 'search_term' not in request.args:
+        return redirect(url_for('dashboard'))
 
-            if not appointments:
-                flash("No appointments matched your search.", 'info')
+    if not search_term:
+        flash('Please enter a search term.', 'warning')
+        return redirect(url_for('dashboard'))
 
-            return render_template('search_results.html', appointments=appointments, search_term=search_term)
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+    except ValueError:
+        page = 1
 
-        except Exception as e:
-            logger.error(f"Search failed: {e}")
-            flash('An error occurred while searching. Please try again.', 'danger')
-            return redirect(url_for('dashboard'))
+    try:
+        user_email = session['email']
+        page_size = get_page_size()
+
+        # Ranked matches from the caller's own index partition
+        appointment_ids, total = search_index.search(user_email, search_term, page=page, page_size=page_size)
+        found = batch_get(
+            dynamodb,
+            APPOINTMENTS_TABLE_NAME,
+            [{'appointment_id': appointment_id} for appointment_id in appointment_ids],
+            projection=SUMMARY_PROJECTION,
+            expression_names=SUMMARY_NAMES
+        )
+        by_id = {item.appointment_id: item for item in summarize(found)}
+        appointments = [by_id[appointment_id] for appointment_id in appointment_ids if appointment_id in by_id]
+
+        if not appointments:
+            flash("No appointments matched your search.", 'info')
+
+        return render_template(
+            'search_results.html',
+            appointments=appointments,
+            search_term=search_term,
+            page=page,
+            total=total,
+            has_next=page * page_size < total
+        )
 
-    return redirect(url_for('dashboard'))
+    except Exception as e:
+        logger.error(f"Search failed: {e}")
+        flash('An error occurred while searching. Please try again.', 'danger')
+        return redirect(url_for('dashboard'))
 
 #profile route
 @app.route('/profile', methods=['GET', 'POST'])
@@ -504,7 +1072,7 @@ def profile():
         return redirect(url_for('login'))
 
     email = session.get('email')
-    user = user_table.get_item(Key={'email': email}).get('Item')
+    user = current_profile()
     if not user:
         flash('User not found', 'danger')
         return redirect(url_for('logout'))
@@ -528,13 +1096,18 @@ def profile():
             expr_values[':spec'] = request.form['specialization']
 
         try:
-            user_table.update_item(
+            updated = user_table.update_item(
                 Key={'email': email},
                 UpdateExpression=update_expression,
                 ExpressionAttributeValues=expr_values,
-                ExpressionAttributeNames=expr_names
+                ExpressionAttributeNames=expr_names,
+                ReturnValues='ALL_NEW'
             )
-            session['name'] = name
+            # Refresh the session copy so this session sees its own edit at once
+            store_profile(session, updated['Attributes'])
+            user_loader().forget(email)
+            if user['role'] == 'doctor':
+                doctor_directory.invalidate()
             flash('Profile updated', 'success')
         except Exception as e:
             logger.error(f"Error updating profile: {e}")
@@ -544,22 +1117,195 @@ def profile():
 
     return render_template('profile.html', user=user)
 
-#health route
+# ----------------------------------------
+# CLI Commands
+# ----------------------------------------
+
+@app.cli.command('create-tables')
+def create_tables_command():
+    """Create the app's tables and GSIs if they don't exist (e.g. on DynamoDB Local)."""
+    create_tables(aws.dynamodb_client(), app_table_definitions())
+
+@app.cli.command('backfill-status-keys')
+def backfill_status_keys():
+    """Set status_date on appointments written before the status index existed."""
+    updated = 0
+    for item in iter_items(
+        appointment_table.scan,
+        ProjectionExpression="appointment_id, #s, appointment_date, status_date",
+        ExpressionAttributeNames={"#s": "status"}
+    ):
+        if 'status_date' in item or 'appointment_date' not in item:
+            continue
+        appointment_table.update_item(
+            Key={'appointment_id': item['appointment_id']},
+            UpdateExpression="SET status_date = :sd",
+            ExpressionAttributeValues={
+                ':sd': status_sort_key(item.get('status', STATUS_PENDING), item['appointment_date'])
+            }
+        )
+        updated += 1
+    logger.info(f"Backfilled status_date on {updated} appointments")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Index every existing appointment into the search index table."""
+    indexed = 0
+    for item in iter_items(appointment_table.scan):
+        search_index.index_appointment(item)
+        indexed += 1
+    logger.info(f"Indexed {indexed} appointments for search")
+
+BULK_WORKERS = int(os.environ.get('BULK_WORKERS', '4'))
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', '500'))
+EXPORT_FIELDS = {
+    'users': ['email', 'name', 'age', 'gender', 'role', 'specialization', 'created_at'],
+    'appointments': ['appointment_id', 'doctor_email', 'doctor_name', 'patient_email', 'patient_name',
+                     'symptoms', 'status', 'appointment_date', 'diagnosis', 'treatment_plan',
+                     'prescription', 'created_at', 'updated_at'],
+}
+
+@app.cli.command('import-users')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(bulk.FORMATS))
+@click.option('--workers', default=BULK_WORKERS, show_default=True)
+@click.option('--chunk-size', default=BULK_CHUNK_SIZE, show_default=True)
+def import_users_command(path, fmt, workers, chunk_size):
+    """Bulk-load users from a CSV or JSON Lines file, hashing passwords in parallel."""
+    stats = bulk.import_users(user_table, bulk.read_records(path, fmt), PASSWORD_HASH_METHOD,
+                              workers=workers, chunk_size=chunk_size)
+    doctor_directory.invalidate()
+    click.echo(f"{stats['written']} users imported, {stats['rejected']} rejected, "
+               f"{stats['skipped']} already registered, "
+               f"{stats['rows_per_sec']:.0f} rows/sec")
+
+@app.cli.command('import-appointments')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(bulk.FORMATS))
+@click.option('--workers', default=BULK_WORKERS, show_default=True)
+@click.option('--chunk-size', default=BULK_CHUNK_SIZE, show_default=True)
+def import_appointments_command(path, fmt, workers, chunk_size):
+    """Bulk-load appointments from a CSV or JSON Lines file and index them for search."""
+    stats = bulk.import_appointments(appointment_table, user_table, bulk.read_records(path, fmt),
+                                     search_table=search_index.table, slots_table=slots_table,
+                                     workers=workers, chunk_size=chunk_size)
+    click.echo(f"{stats['written']} appointments imported, {stats['rejected']} rejected, "
+               f"{stats['skipped']} with a taken slot, "
+               f"{stats['rows_per_sec']:.0f} rows/sec")
+    # Bulk writes bypass the booking transaction, so recount the dashboard counters
+    reconcile_stats(appointment_table, stats_table)
+
+@app.cli.command('export-table')
+@click.argument('table', type=click.Choice(sorted(EXPORT_FIELDS)))
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(bulk.FORMATS))
+@click.option('--segments', default=4, show_default=True, help='Parallel scan segments.')
+def export_table_command(table, path, fmt, segments):
+    """Export users or appointments to CSV or JSON Lines with a parallel scan."""
+    stats = bulk.export_table(
+        user_table if table == 'users' else appointment_table,
+        path,
+        segments=segments,
+        fmt=fmt,
+        fields=EXPORT_FIELDS[table],
+        exclude=('password',)
+    )
+    click.echo(f"{stats['rows']} {table} exported, {stats['rows_per_sec']:.0f} rows/sec")
+
+@app.cli.command('reconcile-stats')
+@click.option('--segments', default=4, show_default=True, help='Parallel scan segments.')
+def reconcile_stats_command(segments):
+    """Rebuild per-doctor and per-patient appointment counters from the appointments table."""
+    corrected = reconcile_stats(appointment_table, stats_table, segments=segments)
+    click.echo(f"{corrected} stats records corrected")
+
+@app.cli.command('archive-appointments')
+@click.option('--older-than-days', default=ARCHIVE_AFTER_DAYS, show_default=True,
+              help='Archive appointments completed more than this many days ago.')
+@click.option('--ttl-grace-days', default=ARCHIVE_TTL_GRACE_DAYS, show_default=True,
+              help='Days archived items stay in AppointmentsTable before TTL deletes them.')
+@click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, show_default=True)
+@click.option('--segments', default=4, show_default=True, help='Parallel scan segments.')
+@click.option('--dry-run', is_flag=True, help='Only count the appointments that would be archived.')
+def archive_appointments_command(older_than_days, ttl_grace_days, batch_size, segments, dry_run):
+    """Export old completed appointments to cold storage and expire them from AppointmentsTable."""
+    stats = archiver.run(older_than_days, ttl_grace_days=ttl_grace_days, batch_size=batch_size,
+                         segments=segments, dry_run=dry_run)
+    click.echo(f"{stats['candidates']} candidates, {stats['archived']} archived, {stats['skipped']} skipped, "
+               f"{stats['rows_per_sec']:.0f} rows/sec")
+
+#health routes: /health/live never touches AWS; /health/ready does (cached)
+@app.route('/health/live')
+def liveness():
+    return {'status': 'alive'}, 200
+
+@app.route('/health/ready')
+def readiness_probe():
+    ready, checks = readiness.check()
+    return {'status': 'ready' if ready else 'not ready', 'checks': checks}, 200 if ready else 503
+
 @app.route('/health')
 def health():
-    return {'status': 'healthy'}, 200
+    return {
+        'status': 'healthy',
+        'readiness': readiness.stats(),
+        'doctor_directory': doctor_directory.stats(),
+        'notifications': outbox.stats(),
+        'circuit_breakers': guarded_reader.snapshot(),
+        'page_cache': page_cache.stats(),
+        'fragment_cache': fragment_cache.stats(),
+        'fanout': fanout.stats(),
+        'rate_limits': rate_limiter.stats(),
+        'archive': archiver.stats(),
+        'password_hashing': password_hasher.stats()
+    }, 200
+
+#metrics route
+@app.route('/metrics')
+def metrics():
+    return instrumentation.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.errorhandler(404)
 def page_not_found(e):
-    return render_template('404.html'), 404
+    return page_cache.render('404.html', status=404)
+
+@app.errorhandler(HashingBusy)
+def hashing_busy(e):
+    logger.warning(f"Password hashing saturated on {request.endpoint}")
+    flash('The server is busy. Please try again in a moment.', 'warning')
+    template = 'register.html' if request.endpoint == 'register' else 'login.html'
+    return render_template(template), 429, {'Retry-After': '1'}
+
+@app.errorhandler(RateLimited)
+def rate_limited(e):
+    logger.warning(f"Rate limited on {request.endpoint} from {request.remote_addr}: {e}")
+    flash('Too many attempts. Please wait a moment and try again.', 'warning')
+    template = 'register.html' if request.endpoint == 'register' else 'login.html'
+    return render_template(template), 429, {'Retry-After': str(math.ceil(e.retry_after))}
 
 @app.errorhandler(500)
 def internal_error(error):
     logger.error(f"500 Internal Server Error: {error}")
-    return render_template("500.html"), 500
+    return page_cache.render('500.html', status=500)
+
+# ----------------------------------------
+# App Factory
+# ----------------------------------------
+
+def create_app():
+    """Return the app and start warming up its AWS clients in the background.
+
+    Importing this module builds no clients and makes no network calls, so a
+    new process answers /health/live as soon as it is listening; call this
+    once per serving process (e.g. ``gunicorn 'app:create_app()'``) so
+    /health/ready turns green and the first real request finds its clients
+    already built.
+    """
+    readiness.warm_up()
+    return app
 
 #run the app
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('FLASK_ENV') == 'development'
-    app.run(host='0.0.0.0', port=port, debug=debug_mode)
+    create_app().run(host='0.0.0.0', port=port, debug=debug_mode)
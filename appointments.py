@@ -0,0 +1,432 @@
+import random
+import time
+import uuid
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+from dynamo import query_page
+
+# ----------------------------------------
+# Appointment model helpers
+# ----------------------------------------
+
+STATUS_PENDING = 'pending'
+STATUS_COMPLETED = 'completed'
+
+# Composite sort key on the doctor status index: "<status>#<appointment_date>"
+STATUS_DATE_ATTR = 'status_date'
+
+# DynamoDB TTL attribute on AppointmentsTable (epoch seconds). Set once an
+# appointment is archived; the item is read-only until TTL deletes it.
+EXPIRES_AT_ATTR = 'expires_at'
+
+
+def status_sort_key(status, appointment_date):
+    """Build the status#appointment_date composite key for an appointment."""
+    return f"{status}#{appointment_date}"
+
+
+def query_doctor_appointments_by_status(table, index_name, doctor_email, status, limit, newest_first=False):
+    """Return up to ``limit`` summaries of a doctor's appointments in one status, ordered by date.
+
+    Uses a single key-condition query on the doctor status index, so only the
+    requested slice is read regardless of how long the doctor's history is.
+    """
+    items, _ = query_page(
+        table.query,
+        limit,
+        IndexName=index_name,
+        KeyConditionExpression="doctor_email = :email AND begins_with(#sd, :prefix)",
+        ProjectionExpression=SUMMARY_PROJECTION,
+        ExpressionAttributeNames=dict(SUMMARY_NAMES, **{"#sd": STATUS_DATE_ATTR}),
+        ExpressionAttributeValues={":email": doctor_email, ":prefix": f"{status}#"},
+        ScanIndexForward=not newest_first
+    )
+    return summarize(items)
+
+
+# ----------------------------------------
+# List-view summaries
+# ----------------------------------------
+
+# The fields dashboards and search results render. Diagnosis, treatment plan
+# and prescription free text stay out of list reads; view_appointment() loads
+# the full item.
+SUMMARY_FIELDS = ('appointment_id', 'doctor_name', 'patient_name', 'appointment_date', 'symptoms', 'status')
+SUMMARY_PROJECTION = 'appointment_id, doctor_name, patient_name, appointment_date, symptoms, #st'
+SUMMARY_NAMES = {'#st': 'status'}
+
+
+class AppointmentSummary:
+    """Compact row for list pages; ``__slots__`` keeps long histories cheap to hold."""
+
+    __slots__ = SUMMARY_FIELDS
+
+    def __init__(self, appointment_id, doctor_name=None, patient_name=None,
+                 appointment_date=None, symptoms=None, status=None):
+        self.appointment_id = appointment_id
+        self.doctor_name = doctor_name
+        self.patient_name = patient_name
+        self.appointment_date = appointment_date
+        self.symptoms = symptoms
+        self.status = status
+
+    @classmethod
+    def from_item(cls, item):
+        return cls(*(item.get(field) for field in SUMMARY_FIELDS))
+
+    def __repr__(self):
+        return f"AppointmentSummary({self.appointment_id!r}, {self.status!r}, {self.appointment_date!r})"
+
+
+def summarize(items):
+    """Turn projected list-query items into AppointmentSummary rows."""
+    return [AppointmentSummary.from_item(item) for item in items]
+
+
+# ----------------------------------------
+# Idempotent, slot-reserving booking
+# ----------------------------------------
+
+# Namespace for appointment ids derived from (patient, idempotency key)
+BOOKING_NAMESPACE = uuid.UUID('6f1c1f1e-3a7e-4c59-9a0e-5d0c2b8f4e21')
+
+# AttributeValue (de)serializers, built on first use: importing
+# boto3.dynamodb.types loads all of boto3, which startup shouldn't pay for
+_codecs = None
+
+
+class SlotUnavailable(Exception):
+    """The doctor already has an appointment at the requested time."""
+
+
+class BookingConflict(Exception):
+    """An appointment transaction kept being cancelled by concurrent writes."""
+
+
+class AppointmentArchived(Exception):
+    """The appointment has been archived (TTL-stamped) and can no longer be edited."""
+
+
+def booking_appointment_id(patient_email, idempotency_key):
+    """Derive a stable appointment id so a resubmitted form maps to the same item."""
+    return str(uuid.uuid5(BOOKING_NAMESPACE, f"{patient_email}:{idempotency_key}"))
+
+
+def slot_id(doctor_email, appointment_date):
+    return f"{doctor_email}#{appointment_date}"
+
+
+def slot_reservation(item):
+    """Build the SlotReservationsTable item that holds an appointment's doctor slot."""
+    return {
+        'slot_id': slot_id(item['doctor_email'], item['appointment_date']),
+        'appointment_id': item['appointment_id'],
+        'patient_email': item['patient_email'],
+        'created_at': datetime.now().isoformat()
+    }
+
+
+def _get_codecs():
+    global _codecs
+    if _codecs is None:
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+        _codecs = (TypeSerializer(), TypeDeserializer())
+    return _codecs
+
+
+def _marshal(item):
+    serializer = _get_codecs()[0]
+    return {key: serializer.serialize(value) for key, value in item.items()}
+
+
+def _unmarshal(item):
+    deserializer = _get_codecs()[1]
+    return {key: deserializer.deserialize(value) for key, value in item.items()}
+
+
+def stats_update(stats_table_name, email, pending=0, completed=0, total=0):
+    """Build a transaction item that adjusts one user's appointment counters.
+
+    Every change also bumps ``data_version`` so cached dashboard fragments
+    keyed on it go stale as soon as the counts move.
+    """
+    return {'Update': {
+        'TableName': stats_table_name,
+        'Key': _marshal({'email': email}),
+        'UpdateExpression': 'ADD pending_count :p, completed_count :c, total_count :t, data_version :one',
+        'ExpressionAttributeValues': _marshal({':p': pending, ':c': completed, ':t': total, ':one': 1})
+    }}
+
+
+def create_appointment(client, appointments_table_name, slots_table_name, item,
+                       stats_table_name=None, max_conflict_retries=3):
+    """Write an appointment and reserve its doctor slot in one transaction.
+
+    Returns (appointment, created). If an appointment with the same id
+    already exists (a double-submit or client retry) nothing is written and
+    the original is returned with ``created=False``. Raises SlotUnavailable
+    if another appointment already holds the doctor's slot. With
+    ``stats_table_name`` the doctor's and patient's counters are incremented
+    in the same transaction, so they never count a booking that failed.
+    """
+    slot = slot_reservation(item)
+    transact_items = [
+        {'Put': {
+            'TableName': appointments_table_name,
+            'Item': _marshal(item),
+            'ConditionExpression': 'attribute_not_exists(appointment_id)'
+        }},
+        {'Put': {
+            'TableName': slots_table_name,
+            'Item': _marshal(slot),
+            'ConditionExpression': 'attribute_not_exists(slot_id)'
+        }},
+    ]
+    if stats_table_name:
+        counts = {'pending': 1, 'total': 1} if item['status'] == STATUS_PENDING else {'completed': 1, 'total': 1}
+        transact_items += [
+            stats_update(stats_table_name, item['doctor_email'], **counts),
+            stats_update(stats_table_name, item['patient_email'], **counts),
+        ]
+    for attempt in range(max_conflict_retries + 1):
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+            return item, True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+                raise
+            reasons = [r.get('Code') for r in e.response.get('CancellationReasons', [])]
+
+        if reasons and reasons[0] == 'ConditionalCheckFailed':
+            response = client.get_item(
+                TableName=appointments_table_name,
+                Key=_marshal({'appointment_id': item['appointment_id']}),
+                ConsistentRead=True
+            )
+            existing = _unmarshal(response.get('Item', {}))
+            return existing or item, False
+        if len(reasons) > 1 and reasons[1] == 'ConditionalCheckFailed':
+            raise SlotUnavailable(slot['slot_id'])
+        if 'TransactionConflict' not in reasons:
+            break
+        # A concurrent transaction touched the same items; try again shortly
+        time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+    raise BookingConflict(slot['slot_id'])
+
+
+def _completion_update(appointments_table_name, appointment, updates, guarded=False):
+    """Build the Update that records ``updates`` and marks an appointment completed.
+
+    The update never applies to an archived (TTL-stamped) appointment: TTL
+    would delete the edit and the archive copy would not have it. ``guarded``
+    also requires that the appointment is not completed yet, for writes that
+    move it from pending to completed in the counters.
+    """
+    values = dict(updates, status=STATUS_COMPLETED,
+                  status_date=status_sort_key(STATUS_COMPLETED, appointment['appointment_date']))
+    names = {f"#f{i}": field for i, field in enumerate(values)}
+    update = {
+        'TableName': appointments_table_name,
+        'Key': _marshal({'appointment_id': appointment['appointment_id']}),
+        'UpdateExpression': 'SET ' + ', '.join(f"{name} = :v{i}" for i, name in enumerate(names)),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': _marshal({f":v{i}": value for i, value in enumerate(values.values())}),
+        'ConditionExpression': f"attribute_not_exists({EXPIRES_AT_ATTR})",
+    }
+    if guarded:
+        update['ConditionExpression'] += ' AND #status <> :completed'
+        update['ExpressionAttributeNames']['#status'] = 'status'
+        update['ExpressionAttributeValues'].update(_marshal({':completed': STATUS_COMPLETED}))
+    return update
+
+
+def complete_appointment(client, appointments_table_name, appointment, updates,
+                         stats_table_name=None, max_conflict_retries=3):
+    """Record a diagnosis and mark an appointment completed; returns True on the first completion.
+
+    ``updates`` are the attributes to set (diagnosis, treatment plan, ...).
+    With ``stats_table_name`` the write runs in a transaction with the
+    doctor's and patient's counters: the first completion moves one pending
+    appointment to completed, guarded by a status condition so a resubmitted
+    diagnosis only edits the appointment. Every edit bumps both users'
+    ``data_version`` so their cached dashboard fragments are refreshed.
+    Raises AppointmentArchived if the appointment has been archived.
+    """
+    if not stats_table_name:
+        try:
+            client.update_item(**_completion_update(appointments_table_name, appointment, updates))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                raise AppointmentArchived(appointment['appointment_id'])
+            raise
+        return False
+
+    first_completion = appointment.get('status') != STATUS_COMPLETED
+    for attempt in range(max_conflict_retries + 1):
+        deltas = {'pending': -1, 'completed': 1} if first_completion else {}
+        transact_items = [
+            {'Update': _completion_update(appointments_table_name, appointment, updates, first_completion)},
+            stats_update(stats_table_name, appointment['doctor_email'], **deltas),
+            stats_update(stats_table_name, appointment['patient_email'], **deltas),
+        ]
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+            return first_completion
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+                raise
+            reasons = [r.get('Code') for r in e.response.get('CancellationReasons', [])]
+
+        if reasons and reasons[0] == 'ConditionalCheckFailed':
+            if not first_completion:
+                raise AppointmentArchived(appointment['appointment_id'])
+            # Completed (or archived) concurrently: apply this submission as a plain edit
+            first_completion = False
+            continue
+        if 'TransactionConflict' not in reasons:
+            break
+        time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+    raise BookingConflict(appointment['appointment_id'])
+
+
+# Per-appointment outcomes of complete_appointments()
+RESULT_COMPLETED = 'completed'
+RESULT_UPDATED = 'updated'
+RESULT_FAILED = 'failed'
+
+# TransactWriteItems takes at most 100 actions. A completion chunk holds its
+# appointment updates plus a counter update per distinct doctor and patient,
+# up to 2 * chunk + 1 actions, so larger chunks would always be rejected.
+TRANSACT_ITEMS_LIMIT = 100
+MAX_COMPLETION_CHUNK_SIZE = (TRANSACT_ITEMS_LIMIT - 1) // 2
+
+
+def complete_appointments(client, appointments_table_name, completions, stats_table_name=None,
+                          chunk_size=25, max_conflict_retries=3):
+    """Record diagnoses for many appointments in chunked transactions.
+
+    ``completions`` is a list of ``(appointment, updates)`` pairs with
+    distinct appointment ids, as for complete_appointment(). Each chunk is
+    one TransactWriteItems call with the appointment updates plus a single
+    counter update per doctor and patient in it (deltas are summed, since a
+    transaction may touch an item only once). A chunk commits or fails as a
+    whole, except that archived appointments are failed with
+    'AppointmentArchived' and the rest of their chunk is retried. Returns
+    ``{appointment_id: (result, error)}`` where result is RESULT_COMPLETED
+    for a first completion, RESULT_UPDATED for a re-edit and RESULT_FAILED
+    with an error code otherwise. ``chunk_size`` is capped at
+    MAX_COMPLETION_CHUNK_SIZE.
+    """
+    chunk_size = max(1, min(chunk_size, MAX_COMPLETION_CHUNK_SIZE))
+    results = {}
+    for start in range(0, len(completions), chunk_size):
+        chunk = completions[start:start + chunk_size]
+        first = {a['appointment_id']: a.get('status') != STATUS_COMPLETED for a, _ in chunk}
+        error = 'TransactionConflict'
+        for attempt in range(max_conflict_retries + 1):
+            transact_items = [
+                {'Update': _completion_update(appointments_table_name, appointment, updates,
+                                              guarded=bool(stats_table_name) and first[appointment['appointment_id']])}
+                for appointment, updates in chunk
+            ]
+            if stats_table_name:
+                deltas = {}
+                for appointment, _ in chunk:
+                    done = first[appointment['appointment_id']]
+                    for email in (appointment['doctor_email'], appointment['patient_email']):
+                        pending, completed = deltas.get(email, (0, 0))
+                        deltas[email] = (pending - done, completed + done)
+                transact_items += [
+                    stats_update(stats_table_name, email, pending=pending, completed=completed)
+                    for email, (pending, completed) in deltas.items()
+                ]
+            try:
+                client.transact_write_items(TransactItems=transact_items)
+                for appointment, _ in chunk:
+                    results[appointment['appointment_id']] = (
+                        RESULT_COMPLETED if first[appointment['appointment_id']] else RESULT_UPDATED, None
+                    )
+                error = None
+                break
+            except ClientError as e:
+                error = e.response.get('Error', {}).get('Code', 'ClientError')
+                if error != 'TransactionCanceledException':
+                    break
+                reasons = [r.get('Code') for r in e.response.get('CancellationReasons', [])]
+
+            # Completed concurrently: apply those submissions as plain edits.
+            # An unguarded update only fails its condition once archived.
+            failed = {appointment['appointment_id'] for (appointment, _), reason in zip(chunk, reasons)
+                      if reason == 'ConditionalCheckFailed'}
+            raced = [appointment_id for appointment_id in failed if first[appointment_id]]
+            archived = failed.difference(raced)
+            if raced or archived:
+                first.update(dict.fromkeys(raced, False))
+                for appointment_id in archived:
+                    results[appointment_id] = (RESULT_FAILED, 'AppointmentArchived')
+                chunk = [(appointment, updates) for appointment, updates in chunk
+                         if appointment['appointment_id'] not in archived]
+                if not chunk:
+                    error = None
+                    break
+                continue
+            error = next((r for r in reasons if r not in (None, 'None')), 'TransactionCanceled')
+            if error != 'TransactionConflict':
+                break
+            time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+        if error:
+            for appointment, _ in chunk:
+                results[appointment['appointment_id']] = (RESULT_FAILED, error)
+    return results
+
+
+# ----------------------------------------
+# Archival
+# ----------------------------------------
+
+
+def mark_archived(client, appointments_table_name, appointment, expires_at,
+                  slots_table_name=None, stats_table_name=None):
+    """Stamp an archived appointment's TTL; returns False if it changed since it was read.
+
+    The stamp only applies if the appointment is still completed, unstamped
+    and not edited since ``appointment`` was read, so an archive copy never
+    hides a later diagnosis edit. In the same transaction the (past) slot
+    reservation is released and, with ``stats_table_name``, the appointment
+    leaves both users' completed and total counts.
+    """
+    condition = f"#status = :completed AND attribute_not_exists({EXPIRES_AT_ATTR})"
+    values = {':completed': STATUS_COMPLETED, ':expires': int(expires_at)}
+    if 'updated_at' in appointment:
+        condition += ' AND updated_at = :updated'
+        values[':updated'] = appointment['updated_at']
+    transact_items = [{'Update': {
+        'TableName': appointments_table_name,
+        'Key': _marshal({'appointment_id': appointment['appointment_id']}),
+        'UpdateExpression': f"SET {EXPIRES_AT_ATTR} = :expires",
+        'ConditionExpression': condition,
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': _marshal(values),
+    }}]
+    if slots_table_name:
+        transact_items.append({'Delete': {
+            'TableName': slots_table_name,
+            'Key': _marshal({'slot_id': slot_id(appointment['doctor_email'], appointment['appointment_date'])}),
+            'ConditionExpression': 'attribute_not_exists(slot_id) OR appointment_id = :id',
+            'ExpressionAttributeValues': _marshal({':id': appointment['appointment_id']}),
+        }})
+    if stats_table_name:
+        transact_items += [
+            stats_update(stats_table_name, appointment['doctor_email'], completed=-1, total=-1),
+            stats_update(stats_table_name, appointment['patient_email'], completed=-1, total=-1),
+        ]
+    try:
+        client.transact_write_items(TransactItems=transact_items)
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+            raise
+        return False
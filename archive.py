@@ -0,0 +1,287 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from appointments import EXPIRES_AT_ATTR, STATUS_COMPLETED, mark_archived
+from bulk import json_default
+from cache import TTLCache
+from dynamo import iter_pages
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Archive storage
+# ----------------------------------------
+# Archived appointments are written as gzip JSON Lines objects under
+# appointments/date=<YYYY-MM-DD>/ (the appointment date). Every object is a
+# series of independent gzip members of up to ``block_size`` records each, so
+# it is still one ordinary .jsonl.gz file for zcat/Athena/pandas, while a
+# single record can be read back with one ranged read of its block.
+
+
+class LocalArchiveStore:
+    """Archive objects as files under a local directory."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a crash never leaves a truncated object behind
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_range(self, key, offset, length):
+        with open(self._path(key), 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def __repr__(self):
+        return f"file://{self.root}"
+
+
+class S3ArchiveStore:
+    """Archive objects in an S3 (or S3-compatible) bucket.
+
+    ``client`` is a callable returning the S3 client, so the store can be
+    built at import time and still pick up each worker process's own client.
+    """
+
+    def __init__(self, client, bucket, prefix=''):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    def put(self, key, data):
+        self.client().put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data,
+                                 ContentType='application/gzip')
+
+    def get_range(self, key, offset, length):
+        response = self.client().get_object(Bucket=self.bucket, Key=self.prefix + key,
+                                            Range=f"bytes={offset}-{offset + length - 1}")
+        return response['Body'].read()
+
+    def __repr__(self):
+        return f"s3://{self.bucket}/{self.prefix}"
+
+
+def archive_store_from_url(url, s3_client=None):
+    """Build an archive store from ``file://<dir>`` (or a bare path) or ``s3://<bucket>/<prefix>``."""
+    if url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3ArchiveStore(s3_client, bucket, prefix)
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+    return LocalArchiveStore(url)
+
+
+def encode_blocks(items, block_size=100):
+    """Serialize items into concatenated gzip members.
+
+    Returns (data, locations) where ``locations`` maps each appointment_id
+    to the (offset, length) of the member holding it.
+    """
+    chunks = []
+    locations = {}
+    offset = 0
+    for start in range(0, len(items), block_size):
+        block = items[start:start + block_size]
+        lines = ''.join(json.dumps(item, default=json_default, sort_keys=True) + '\n' for item in block)
+        member = gzip.compress(lines.encode('utf-8'), mtime=0)
+        for item in block:
+            locations[item['appointment_id']] = (offset, len(member))
+        chunks.append(member)
+        offset += len(member)
+    return b''.join(chunks), locations
+
+
+def decode_block(data):
+    """Yield the records of one or more gzip members."""
+    for line in gzip.decompress(data).decode('utf-8').splitlines():
+        if line:
+            yield json.loads(line)
+
+
+# ----------------------------------------
+# Appointment archiver
+# ----------------------------------------
+
+
+class AppointmentArchiver:
+    """Move old completed appointments out of AppointmentsTable into cold storage.
+
+    ``run()`` scans for appointments completed more than ``older_than_days``
+    ago. Each batch is written to the store first, then indexed in
+    ArchiveIndexTable (appointment_id -> object, offset, length), and only
+    then stamped with a DynamoDB TTL (see ``mark_archived``), so an item is
+    never deleted before its archive copy exists. The stamped items also
+    leave the search index. ``find()`` reads one archived appointment back
+    through the index; archived records never change, so they are cached.
+    """
+
+    def __init__(self, store, index_table, appointments_table, client, appointments_table_name,
+                 slots_table_name=None, stats_table_name=None, search_index=None,
+                 block_size=100, cache_ttl=3600, cache_maxsize=1024):
+        self.store = store
+        self.index_table = index_table
+        self.appointments_table = appointments_table
+        self.client = client
+        self.appointments_table_name = appointments_table_name
+        self.slots_table_name = slots_table_name
+        self.stats_table_name = stats_table_name
+        self.search_index = search_index
+        self.block_size = block_size
+        self.cache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
+        self.lookups = 0
+        self.found = 0
+
+    # -- reads --
+
+    def find(self, appointment_id):
+        """Return an archived appointment by id, or None if it was never archived."""
+        self.lookups += 1
+        cached = self.cache.get(appointment_id)
+        if cached is not None:
+            self.found += 1
+            return cached
+        entry = self.index_table.get_item(Key={'appointment_id': appointment_id}).get('Item')
+        if not entry:
+            return None
+        data = self.store.get_range(entry['object_key'], int(entry['offset']), int(entry['length']))
+        for record in decode_block(data):
+            if record.get('appointment_id') == appointment_id:
+                self.cache.set(appointment_id, record)
+                self.found += 1
+                return record
+        logger.error(f"Archive index points at {entry['object_key']} but {appointment_id} is not in that block")
+        return None
+
+    # -- archival run --
+
+    def _candidates(self, segment, segments, cutoff):
+        for page in iter_pages(
+            self.appointments_table.scan,
+            Segment=segment,
+            TotalSegments=segments,
+            FilterExpression=(
+                f"#st = :completed AND attribute_not_exists({EXPIRES_AT_ATTR}) AND "
+                "(updated_at < :cutoff OR (attribute_not_exists(updated_at) AND appointment_date < :cutoff))"
+            ),
+            ExpressionAttributeNames={'#st': 'status'},
+            ExpressionAttributeValues={':completed': STATUS_COMPLETED, ':cutoff': cutoff}
+        ):
+            yield from page.get('Items', [])
+
+    def _archive_batch(self, items, batch_name, expires_at):
+        """Write, index and stamp one batch; returns (archived, skipped)."""
+        partitions = defaultdict(list)
+        for item in items:
+            partitions[str(item.get('appointment_date', 'unknown'))[:10]].append(item)
+
+        archived_at = datetime.now().isoformat()
+        archived = skipped = 0
+        for day, day_items in sorted(partitions.items()):
+            object_key = f"appointments/date={day}/{batch_name}.jsonl.gz"
+            data, locations = encode_blocks(day_items, self.block_size)
+            self.store.put(object_key, data)
+
+            with self.index_table.batch_writer(overwrite_by_pkeys=['appointment_id']) as batch:
+                for item in day_items:
+                    offset, length = locations[item['appointment_id']]
+                    batch.put_item(Item={
+                        'appointment_id': item['appointment_id'],
+                        'doctor_email': item.get('doctor_email'),
+                        'patient_email': item.get('patient_email'),
+                        'object_key': object_key,
+                        'offset': offset,
+                        'length': length,
+                        'archived_at': archived_at,
+                    })
+
+            stamped = []
+            for item in day_items:
+                if mark_archived(self.client, self.appointments_table_name, item, expires_at,
+                                 slots_table_name=self.slots_table_name,
+                                 stats_table_name=self.stats_table_name):
+                    stamped.append(item)
+                else:
+                    # Edited since the scan read it; the next run archives the new version
+                    skipped += 1
+            archived += len(stamped)
+            if self.search_index is not None and stamped:
+                try:
+                    self.search_index.remove_appointments(stamped)
+                except Exception as e:
+                    logger.error(f"Removing search postings failed for {object_key}: {e}")
+        return archived, skipped
+
+    def run(self, older_than_days, ttl_grace_days=7, batch_size=1000, segments=4, dry_run=False):
+        """Archive appointments completed more than ``older_than_days`` ago; returns run stats.
+
+        Archived items get a TTL ``ttl_grace_days`` in the future, leaving a
+        window to verify the archive before DynamoDB deletes them. With
+        ``dry_run`` candidates are only counted.
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        expires_at = time.time() + ttl_grace_days * 86400
+        run_id = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        lock = threading.Lock()
+        stats = {'candidates': 0, 'archived': 0, 'skipped': 0}
+        started = time.perf_counter()
+
+        def archive_segment(segment):
+            batch = []
+            batches = 0
+
+            def flush():
+                nonlocal batch, batches
+                if not dry_run:
+                    archived, skipped = self._archive_batch(batch, f"{run_id}-{segment}-{batches}", expires_at)
+                    with lock:
+                        stats['archived'] += archived
+                        stats['skipped'] += skipped
+                batches += 1
+                batch = []
+
+            for item in self._candidates(segment, segments, cutoff):
+                with lock:
+                    stats['candidates'] += 1
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+
+        with ThreadPoolExecutor(max_workers=segments, thread_name_prefix='archive') as pool:
+            for future in [pool.submit(archive_segment, segment) for segment in range(segments)]:
+                future.result()
+
+        stats['seconds'] = time.perf_counter() - started
+        stats['rows_per_sec'] = stats['archived'] / stats['seconds'] if stats['seconds'] else 0.0
+        logger.info(
+            f"Archive run {run_id}: {stats['candidates']} candidates older than {older_than_days} days, "
+            f"{stats['archived']} archived to {self.store!r}, {stats['skipped']} skipped"
+            + (' (dry run)' if dry_run else '')
+        )
+        return stats
+
+    def stats(self):
+        return {
+            'store': repr(self.store),
+            'lookups': self.lookups,
+            'found': self.found,
+            'cache': self.cache.stats(),
+        }
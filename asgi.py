@@ -0,0 +1,24 @@
+"""ASGI entry point for the async serving mode.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The event loop holds connections (keep-alive and slow clients cost no
+thread), requests run on a bounded pool of ASGI_WORKERS threads, and
+SERVING_MODE=async makes each request fan its independent DynamoDB reads
+out concurrently. The sync mode (python app.py or any WSGI server) remains
+the default.
+"""
+import os
+
+os.environ.setdefault('SERVING_MODE', 'async')
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError as e:  # pragma: no cover - optional dependency
+    raise ImportError('The async serving mode needs: pip install -r requirements-async.txt') from e
+
+from app import create_app
+
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 64))
+
+application = WSGIMiddleware(create_app(), workers=ASGI_WORKERS)
@@ -0,0 +1,125 @@
+import os
+import threading
+
+# ----------------------------------------
+# Shared AWS client factory
+# ----------------------------------------
+
+class AWSClientFactory:
+    """Builds tuned boto3 clients lazily, once per process.
+
+    Clients share one botocore ``Config`` with an explicit connection pool
+    size, connect/read timeouts, adaptive retries and optional TCP
+    keepalive. Nothing is created until first use -- boto3 itself is only
+    imported then, since loading it and its service models is most of a cold
+    start -- and everything is rebuilt in a forked child so pre-fork workers
+    never share sockets with their parent.
+    """
+
+    def __init__(self, region_name, dynamodb_endpoint_url=None, sns_endpoint_url=None,
+                 s3_endpoint_url=None, max_pool_connections=50, connect_timeout=2, read_timeout=5,
+                 max_attempts=5, retry_mode='adaptive', tcp_keepalive=True):
+        self.region_name = region_name
+        self.dynamodb_endpoint_url = dynamodb_endpoint_url
+        self.sns_endpoint_url = sns_endpoint_url
+        self.s3_endpoint_url = s3_endpoint_url
+        self.config_options = dict(
+            region_name=region_name,
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={'mode': retry_mode, 'max_attempts': max_attempts},
+            tcp_keepalive=tcp_keepalive
+        )
+        self.config = None
+        self._lock = threading.Lock()
+        self._client_hooks = []
+        self._reset_state()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._session = None
+        self._dynamodb = None
+        self._dynamodb_client = None
+        self._sns = None
+        self._s3 = None
+        self._tables = {}
+
+    def _get(self, attr, build):
+        if self._pid != os.getpid():
+            self._reset_state()
+        value = getattr(self, attr)
+        if value is None:
+            with self._lock:
+                value = getattr(self, attr)
+                if value is None:
+                    if self._session is None:
+                        import boto3
+                        from botocore.config import Config
+
+                        if self.config is None:
+                            self.config = Config(**self.config_options)
+                        # boto3's default session is not safe to share across threads
+                        self._session = boto3.session.Session(region_name=self.region_name)
+                    value = build()
+                    client = getattr(getattr(value, 'meta', None), 'client', value)
+                    for hook in self._client_hooks:
+                        hook(client)
+                    setattr(self, attr, value)
+        return value
+
+    def add_client_hook(self, hook):
+        """Call ``hook(client)`` for every low-level client created from now on."""
+        self._client_hooks.append(hook)
+
+    def dynamodb(self):
+        """Return the process-wide DynamoDB resource."""
+        return self._get('_dynamodb', lambda: self._session.resource(
+            'dynamodb', endpoint_url=self.dynamodb_endpoint_url, config=self.config
+        ))
+
+    def dynamodb_client(self):
+        """Return the process-wide low-level DynamoDB client (AttributeValue-typed I/O).
+
+        This is a separate client from the resource's ``meta.client``: that one
+        serializes plain Python values itself, so pre-marshalled items (e.g.
+        TransactWriteItems built with TypeSerializer) would be wrapped twice.
+        """
+        return self._get('_dynamodb_client', lambda: self._session.client(
+            'dynamodb', endpoint_url=self.dynamodb_endpoint_url, config=self.config
+        ))
+
+    def sns(self):
+        """Return the process-wide SNS client."""
+        return self._get('_sns', lambda: self._session.client(
+            'sns', endpoint_url=self.sns_endpoint_url, config=self.config
+        ))
+
+    def s3(self):
+        """Return the process-wide S3 client (any S3-compatible store via the endpoint URL)."""
+        return self._get('_s3', lambda: self._session.client(
+            's3', endpoint_url=self.s3_endpoint_url, config=self.config
+        ))
+
+    def table(self, name):
+        """Return a Table handle for this process."""
+        resource = self.dynamodb()
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = resource.Table(name)
+        return table
+
+    def lazy_table(self, name):
+        return LazyProxy(lambda: self.table(name))
+
+
+class LazyProxy:
+    """Forwards attribute access to an object resolved on first use."""
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
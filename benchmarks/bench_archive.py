@@ -0,0 +1,128 @@
+"""Measure an archive run and what it takes off the hot appointment tables.
+
+Seeds a local DynamoDB stand-in (moto in-process, or --endpoint) through the
+harness, archives completed appointments older than --older-than-days into a
+temporary file:// store (or --storage-url), then reports archive throughput,
+the per-doctor DoctorEmailIndex read size before and after the TTL sweep,
+and view lookup latency for hot items, archived items (index + ranged read)
+and cached archived items. Neither moto nor DynamoDB Local runs TTL deletion,
+so the sweep is simulated by deleting the stamped items.
+
+Usage:
+    python benchmarks/bench_archive.py --appointments 5000 --older-than-days 90
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import configure_environment, percentile, seed, start_moto  # noqa: E402
+
+
+def index_items_per_doctor(app_module, doctors):
+    from dynamo import iter_items
+
+    counts = []
+    for doctor in doctors:
+        counts.append(sum(1 for _ in iter_items(
+            app_module.appointment_table.query,
+            IndexName='DoctorEmailIndex',
+            KeyConditionExpression='doctor_email = :email',
+            ExpressionAttributeValues={':email': doctor['email']},
+            ProjectionExpression='appointment_id'
+        )))
+    return sum(counts) / len(counts) if counts else 0.0
+
+
+def sweep_expired(app_module):
+    """Stand in for DynamoDB's TTL deletion: remove every stamped appointment."""
+    from appointments import EXPIRES_AT_ATTR
+    from dynamo import iter_items
+
+    deleted = 0
+    with app_module.appointment_table.batch_writer() as batch:
+        for item in iter_items(app_module.appointment_table.scan,
+                               FilterExpression=f"attribute_exists({EXPIRES_AT_ATTR})",
+                               ProjectionExpression='appointment_id'):
+            batch.delete_item(Key={'appointment_id': item['appointment_id']})
+            deleted += 1
+    return deleted
+
+
+def time_lookups(fn, ids):
+    latencies = []
+    for appointment_id in ids:
+        start = time.perf_counter()
+        fn(appointment_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 50), percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', help='existing DynamoDB endpoint (default: start moto in-process)')
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--doctors', type=int, default=20)
+    parser.add_argument('--appointments', type=int, default=3000)
+    parser.add_argument('--older-than-days', type=int, default=90)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--storage-url', help='archive store (default: a temporary file:// directory)')
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--table-suffix', default='Archive')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_moto()
+    configure_environment(endpoint, SimpleNamespace(hash_method=args.hash_method, table_suffix=args.table_suffix))
+    storage = tempfile.TemporaryDirectory(prefix='medtrack-archive-')
+    os.environ['ARCHIVE_STORAGE_URL'] = args.storage_url or f"file://{storage.name}"
+
+    try:
+        import app as app_module
+        from dynamo import iter_items
+
+        rng = random.Random(args.seed)
+        _, doctors = seed(app_module, args, rng)
+        before = index_items_per_doctor(app_module, doctors)
+
+        stats = app_module.archiver.run(args.older_than_days, batch_size=args.batch_size, segments=args.segments)
+        swept = sweep_expired(app_module)
+        after = index_items_per_doctor(app_module, doctors)
+
+        hot_ids = [item['appointment_id'] for item in iter_items(
+            app_module.appointment_table.scan, ProjectionExpression='appointment_id')]
+        archived_ids = [item['appointment_id'] for item in iter_items(
+            app_module.archiver.index_table.scan, ProjectionExpression='appointment_id')]
+        hot_ids = rng.sample(hot_ids, min(args.lookups, len(hot_ids)))
+        archived_ids = rng.sample(archived_ids, min(args.lookups, len(archived_ids)))
+
+        hot = time_lookups(lambda i: app_module.appointment_table.get_item(Key={'appointment_id': i}), hot_ids)
+        app_module.archiver.cache.clear()
+        cold = time_lookups(app_module.archiver.find, archived_ids)
+        cached = time_lookups(app_module.archiver.find, archived_ids)
+
+        print(f"\n{args.appointments} appointments, archiving completed ones older than {args.older_than_days} days")
+        print(f"archived {stats['archived']} ({stats['skipped']} skipped) in {stats['seconds']:.1f}s, "
+              f"{stats['rows_per_sec']:.0f} rows/sec; TTL sweep removed {swept}")
+        print(f"DoctorEmailIndex items per doctor: {before:.0f} before, {after:.0f} after")
+        print(f"{'lookup':<16}{'p50 ms':>9}{'p95 ms':>9}")
+        for label, (p50, p95) in (('hot get_item', hot), ('archive', cold), ('archive cached', cached)):
+            print(f"{label:<16}{p50:>9.2f}{p95:>9.2f}")
+    finally:
+        storage.cleanup()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
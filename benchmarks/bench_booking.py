@@ -0,0 +1,170 @@
+"""Concurrent booking stress test: double-submits and slot races must book exactly once.
+
+Two scenarios run against a local DynamoDB stand-in (--endpoint, e.g.
+DynamoDB Local, or moto in-process with its requests serialized, since
+moto's backends are not thread-safe):
+
+  resubmit  one patient submits the same booking form (same idempotency key)
+            from many threads at once -- exactly one submission books, every
+            other one is answered with the existing appointment.
+  race      many patients try to book the same doctor slot at once -- exactly
+            one books, every other one is told the slot is taken.
+
+Each round checks that exactly one appointment holds the slot and that every
+submission got one of those answers. Exits 1 if any check fails.
+
+Usage:
+    python benchmarks/bench_booking.py --threads 32 --rounds 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import PASSWORD, configure_environment, start_moto  # noqa: E402
+
+
+def seed_users(app_module, patients):
+    from schema import create_tables
+
+    create_tables(app_module.aws.dynamodb_client(), app_module.app_table_definitions())
+    password_hash = app_module.password_hasher.hash(PASSWORD)
+    with app_module.user_table.batch_writer() as batch:
+        batch.put_item(Item={'email': 'doctor@stress.local', 'name': 'Stress Doctor', 'role': 'doctor',
+                             'password': password_hash, 'specialization': 'General'})
+        for i in range(patients):
+            batch.put_item(Item={'email': f"patient{i}@stress.local", 'name': f"Patient {i}", 'role': 'patient',
+                                 'password': password_hash})
+
+
+def logged_in_client(app_module, email):
+    client = app_module.app.test_client()
+    client.post('/login', data={'email': email, 'password': PASSWORD, 'role': 'patient'})
+    return client
+
+
+# Flash message -> outcome of a booking submission
+OUTCOMES = {
+    'Appointment booked successfully.': 'booked',
+    'This appointment was already booked.': 'replayed',
+    'That time slot is already taken. Please choose another time.': 'slot_taken',
+}
+
+
+def submit_concurrently(clients, forms):
+    """Submit the forms at once; returns each submission's outcome (see OUTCOMES)."""
+    barrier = threading.Barrier(len(clients))
+    outcomes = []
+
+    def submit(client, form):
+        barrier.wait()
+        response = client.post('/book_appointment', data=form)
+        with client.session_transaction() as sess:
+            messages = [message for _, message in sess.pop('_flashes', [])]
+        outcome = OUTCOMES.get(messages[-1] if messages else None)
+        if response.status_code != 302 or outcome is None:
+            outcome = f"failed ({response.status_code}: {'; '.join(messages) or 'no message'})"
+        outcomes.append(outcome)
+
+    threads = [threading.Thread(target=submit, args=(c, f)) for c, f in zip(clients, forms)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def check_round(label, found, outcomes, expected_other):
+    """Print a round's result; returns the number of failed checks."""
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    print(f"{label}: {len(found)} appointment(s) from {len(outcomes)} submissions {counts}")
+    failures = 0
+    if len(found) != 1:
+        print(f"  FAIL: expected exactly 1 appointment, found {len(found)}")
+        failures += 1
+    if counts.get('booked', 0) != 1 or counts.get(expected_other, 0) != len(outcomes) - 1:
+        print(f"  FAIL: expected 1 booked and {len(outcomes) - 1} {expected_other}")
+        failures += 1
+    return failures
+
+
+def appointments_for_slot(app_module, appointment_date):
+    from dynamo import iter_items
+
+    return list(iter_items(
+        app_module.appointment_table.query,
+        IndexName='DoctorEmailIndex',
+        KeyConditionExpression="doctor_email = :email AND appointment_date = :date",
+        ExpressionAttributeValues={":email": 'doctor@stress.local', ":date": appointment_date}
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--table-suffix', default='Stress')
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_moto(serialized=True)
+    configure_environment(endpoint, SimpleNamespace(hash_method=args.hash_method, table_suffix=args.table_suffix))
+
+    try:
+        import app as app_module
+
+        seed_users(app_module, args.threads)
+        clients = [logged_in_client(app_module, f"patient{i}@stress.local") for i in range(args.threads)]
+        failures = 0
+        start = time.perf_counter()
+
+        for round_number in range(args.rounds):
+            # Same patient, same idempotency key, many concurrent submissions
+            form = {
+                'doctor_email': 'doctor@stress.local',
+                'symptoms': 'resubmitted form',
+                'appointment_date': '2030-01-01',
+                'appointment_time': f"{8 + round_number:02d}:00",
+                'idempotency_key': str(uuid.uuid4()),
+            }
+            resubmit_clients = [logged_in_client(app_module, 'patient0@stress.local') for _ in range(args.threads)]
+            outcomes = submit_concurrently(resubmit_clients, [form] * args.threads)
+            found = appointments_for_slot(app_module, f"2030-01-01T{form['appointment_time']}")
+            failures += check_round(f"round {round_number} resubmit", found, outcomes, 'replayed')
+
+            # Different patients racing for the same doctor slot
+            slot_time = f"{8 + round_number:02d}:30"
+            forms = [{
+                'doctor_email': 'doctor@stress.local',
+                'symptoms': f"race from patient {i}",
+                'appointment_date': '2030-01-02',
+                'appointment_time': slot_time,
+                'idempotency_key': str(uuid.uuid4()),
+            } for i in range(args.threads)]
+            outcomes = submit_concurrently(clients, forms)
+            found = appointments_for_slot(app_module, f"2030-01-02T{slot_time}")
+            failures += check_round(f"round {round_number} race    ", found, outcomes, 'slot_taken')
+
+        elapsed = time.perf_counter() - start
+        submissions = args.rounds * args.threads * 2
+        print(f"\n{submissions} submissions in {elapsed:.2f}s ({submissions / elapsed:.1f}/s), failed checks: {failures}")
+        if failures:
+            sys.exit(1)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
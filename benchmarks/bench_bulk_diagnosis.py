@@ -0,0 +1,122 @@
+"""Compare one /bulk_diagnosis submission with N single /view_appointment submissions.
+
+Seeds a doctor and 2 x N pending appointments on a local DynamoDB stand-in
+(moto in-process, or --endpoint). One doctor session then completes N of
+them one POST at a time and the other N with a single JSON POST to
+/bulk_diagnosis. Reports wall time, DynamoDB calls per mode and the
+doctor's counters afterwards. --ddb-latency-ms adds a fixed delay to every
+DynamoDB call to stand in for a network round trip.
+
+Usage:
+    python benchmarks/bench_bulk_diagnosis.py --appointments 50 --ddb-latency-ms 10
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_booking import seed_users  # noqa: E402
+from harness import PASSWORD, CallRecorder, configure_environment, start_moto  # noqa: E402
+
+DOCTOR = 'doctor@stress.local'
+
+
+def seed_appointments(app_module, count, patients):
+    from stats import reconcile_stats
+
+    ids = []
+    with app_module.appointment_table.batch_writer() as batch:
+        for i in range(count):
+            appointment_id = str(uuid.uuid4())
+            appointment_date = f"2030-02-{1 + i // 24:02d}T{i % 24:02d}:00"
+            batch.put_item(Item={
+                'appointment_id': appointment_id,
+                'doctor_email': DOCTOR,
+                'doctor_name': 'Stress Doctor',
+                'patient_email': f"patient{i % patients}@stress.local",
+                'patient_name': f"Patient {i % patients}",
+                'symptoms': 'end of day visit',
+                'status': 'pending',
+                'appointment_date': appointment_date,
+                'status_date': f"pending#{appointment_date}",
+                'created_at': '2030-01-01T00:00:00',
+            })
+            ids.append(appointment_id)
+    reconcile_stats(app_module.appointment_table, app_module.stats_table)
+    return ids
+
+
+def diagnosis(appointment_id):
+    return {'diagnosis': f"Diagnosis for {appointment_id[:8]}", 'treatment_plan': 'Rest and fluids',
+            'prescription': 'Paracetamol'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', help='existing DynamoDB endpoint (default: start moto in-process)')
+    parser.add_argument('--appointments', type=int, default=50, help='appointments completed per mode')
+    parser.add_argument('--patients', type=int, default=10)
+    parser.add_argument('--ddb-latency-ms', type=float, default=10)
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--table-suffix', default='BulkDiagnosis')
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_moto()
+    configure_environment(endpoint, SimpleNamespace(hash_method=args.hash_method, table_suffix=args.table_suffix))
+
+    try:
+        import app as app_module
+        from stats import get_stats
+
+        seed_users(app_module, args.patients)
+        ids = seed_appointments(app_module, args.appointments * 2, args.patients)
+        sequential_ids, bulk_ids = ids[:args.appointments], ids[args.appointments:]
+
+        recorder = CallRecorder()
+        for client in (app_module.aws.dynamodb().meta.client, app_module.aws.dynamodb_client()):
+            recorder.install(client)
+            if args.ddb_latency_ms:
+                client.meta.events.register('before-send.dynamodb',
+                                            lambda **kwargs: time.sleep(args.ddb_latency_ms / 1000))
+
+        doctor = app_module.app.test_client()
+        doctor.post('/login', data={'email': DOCTOR, 'password': PASSWORD, 'role': 'doctor'})
+
+        recorder.route('sequential')
+        start = time.perf_counter()
+        failures = 0
+        for appointment_id in sequential_ids:
+            response = doctor.post(f"/view_appointment/{appointment_id}", data=diagnosis(appointment_id))
+            failures += response.status_code != 302
+        sequential_seconds = time.perf_counter() - start
+
+        recorder.route('bulk')
+        start = time.perf_counter()
+        response = doctor.post('/bulk_diagnosis', json={'diagnoses': [
+            dict(diagnosis(appointment_id), appointment_id=appointment_id) for appointment_id in bulk_ids
+        ]})
+        bulk_seconds = time.perf_counter() - start
+        recorder.route(None)
+        summary = response.get_json()['summary']
+
+        print(f"\n{args.appointments} diagnoses per mode, {args.ddb_latency_ms:.0f}ms added per DynamoDB call")
+        print(f"{'mode':<12}{'seconds':>9}{'ddb calls':>11}  calls by operation")
+        for mode, seconds in (('sequential', sequential_seconds), ('bulk', bulk_seconds)):
+            calls = dict(recorder.calls[mode])
+            print(f"{mode:<12}{seconds:>9.2f}{sum(calls.values()):>11}  {calls}")
+        print(f"sequential failures: {failures}; bulk results: {summary}")
+        print(f"doctor counters: {get_stats(app_module.stats_table, DOCTOR)}")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark password verification throughput (logins/sec per core).
+
+Usage:
+    python benchmarks/bench_hashing.py --logins 200 --method scrypt:32768:8:1 --method pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import HashingBusy, PasswordHasher  # noqa: E402
+
+
+def run(method, logins, workers, concurrency):
+    hasher = PasswordHasher(method=method, workers=workers, max_pending=concurrency)
+    stored = hasher.hash('correct horse battery staple')
+    hasher.verify(stored, 'warm up the pool')
+
+    def login(_):
+        try:
+            return hasher.verify(stored, 'correct horse battery staple')
+        except HashingBusy:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    rejected = results.count(None)
+    completed = logins - rejected
+    rate = completed / elapsed if elapsed else 0.0
+    return {
+        'method': method,
+        'workers': workers,
+        'completed': completed,
+        'rejected': rejected,
+        'seconds': elapsed,
+        'logins_per_sec': rate,
+        'logins_per_sec_per_core': rate / max(1, workers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--method', action='append', help='Werkzeug hash method (repeatable)')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concurrency', type=int, default=32, help='simulated concurrent login requests')
+    args = parser.parse_args()
+
+    methods = args.method or ['scrypt:32768:8:1', 'pbkdf2:sha256:600000']
+    print(f"{'method':<28} {'workers':>7} {'ok':>6} {'429':>5} {'logins/s':>10} {'per core':>10}")
+    for method in methods:
+        r = run(method, args.logins, args.workers, args.concurrency)
+        print(f"{r['method']:<28} {r['workers']:>7} {r['completed']:>6} {r['rejected']:>5} "
+              f"{r['logins_per_sec']:>10.1f} {r['logins_per_sec_per_core']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
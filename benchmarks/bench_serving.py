@@ -0,0 +1,193 @@
+"""Compare the sync (WSGI) and async (ASGI + concurrent fan-out) serving modes.
+
+Seeds a local DynamoDB stand-in (moto in-process, or --endpoint), then for
+each mode starts the app in a subprocess -- the threaded Werkzeug server for
+sync, uvicorn on asgi.py for async -- and drives logged-in dashboard requests
+from concurrent keep-alive connections. --ddb-latency-ms adds a fixed delay
+to every DynamoDB call to stand in for a real network round trip (moto
+answers in milliseconds), which is what fan-out overlaps. moto itself is
+CPU-bound and handles concurrent queries one at a time, so keep the data
+set small or point --endpoint at DynamoDB Local for larger runs. Fragment
+caching is disabled so every request takes the DynamoDB path.
+
+Usage:
+    pip install -r benchmarks/requirements.txt -r requirements-async.txt
+    python benchmarks/bench_serving.py --clients 16 --duration 15 --ddb-latency-ms 20
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import PASSWORD, ROOT, configure_environment, free_port, percentile, seed, start_moto  # noqa: E402
+
+MODES = ('sync', 'async')
+
+
+# ----------------------------------------
+# Server subprocess
+# ----------------------------------------
+
+def serve(mode, port, latency_ms):
+    """Run the app in this process in the given serving mode (subprocess entry point)."""
+    os.environ['SERVING_MODE'] = mode
+    import app as app_module
+
+    if latency_ms:
+        def add_latency(client):
+            client.meta.events.register('before-send.dynamodb', lambda **kwargs: time.sleep(latency_ms / 1000))
+        app_module.aws.add_client_hook(add_latency)
+
+    if mode == 'async':
+        import uvicorn
+        from asgi import application
+
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning')
+    else:
+        from werkzeug.serving import run_simple
+
+        run_simple('127.0.0.1', port, app_module.create_app(), threaded=True)
+
+
+def start_server(mode, args):
+    port = free_port()
+    env = dict(os.environ, SERVING_MODE=mode, FRAGMENT_CACHE_TTL='0')
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(port),
+         '--ddb-latency-ms', str(args.ddb_latency_ms)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health/ready')
+            if conn.getresponse().status == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+# ----------------------------------------
+# Load driver
+# ----------------------------------------
+
+def login(conn, user):
+    body = urllib.parse.urlencode({'email': user['email'], 'password': PASSWORD, 'role': user['role']})
+    conn.request('POST', '/login', body=body, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    return response.getheader('Set-Cookie', '').split(';', 1)[0]
+
+
+def run_client(port, user, deadline, results):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    cookie = login(conn, user)
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', '/dashboard', headers={'Cookie': cookie})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            ok = False
+        results.append(((time.perf_counter() - start) * 1000, ok))
+
+
+def drive(port, users, args):
+    results = []
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=run_client, args=(port, users[i % len(users)], deadline, results))
+               for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    latencies = [ms for ms, _ in results]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, ok in results if not ok),
+        'req_per_sec': len(results) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', help='existing DynamoDB endpoint (default: start moto in-process)')
+    parser.add_argument('--patients', type=int, default=40)
+    parser.add_argument('--doctors', type=int, default=8)
+    parser.add_argument('--appointments', type=int, default=100)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per mode')
+    parser.add_argument('--ddb-latency-ms', type=float, default=20)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--table-suffix', default='Serving')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.ddb_latency_ms)
+        return
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_moto()
+    configure_environment(endpoint, SimpleNamespace(hash_method=args.hash_method, table_suffix=args.table_suffix))
+
+    try:
+        import app as app_module
+
+        rng = random.Random(args.seed)
+        patients, doctors = seed(app_module, args, rng)
+        users = patients[:args.clients // 2] + doctors[:args.clients - args.clients // 2]
+        rng.shuffle(users)
+
+        report = {}
+        for mode in args.modes.split(','):
+            process, port = start_server(mode, args)
+            try:
+                report[mode] = drive(port, users, args)
+            finally:
+                process.terminate()
+                process.wait()
+
+        print(f"\n{args.clients} clients, {args.duration:.0f}s per mode, "
+              f"{args.ddb_latency_ms:.0f}ms added per DynamoDB call")
+        print(f"{'mode':<8}{'reqs':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for mode, row in report.items():
+            print(f"{mode:<8}{row['requests']:>8}{row['errors']:>6}{row['req_per_sec']:>9.1f}"
+                  f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Measure how fast a freshly launched MedTrack process can answer health probes.
+
+Starts a local DynamoDB stand-in (moto in-process, or --endpoint) with the
+app's tables, then launches the app --runs times as a new Werkzeug server
+process via create_app() and polls it, reporting for each launch:
+
+  import    time to import app.py, measured inside the child
+  live      launch -> first 200 from /health/live
+  ready     launch -> first 200 from /health/ready (clients built, DynamoDB answering)
+  first     launch -> first /login page after ready
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import ROOT, configure_environment, free_port, percentile, start_moto  # noqa: E402
+
+
+def serve(port):
+    """Import the app, report the import time on stdout and serve (subprocess entry point)."""
+    started = time.perf_counter()
+    import app as app_module
+
+    print(json.dumps({'import_ms': (time.perf_counter() - started) * 1000}), flush=True)
+    from werkzeug.serving import run_simple
+
+    run_simple('127.0.0.1', port, app_module.create_app(), threaded=True)
+
+
+def wait_for(port, path, deadline, poll=0.002):
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(poll)
+    raise RuntimeError(f"{path} did not answer 200 on port {port}")
+
+
+def launch(timeout):
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port)],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        live = wait_for(port, '/health/live', deadline)
+        ready = wait_for(port, '/health/ready', deadline)
+        first = wait_for(port, '/login', deadline)
+        import_ms = json.loads(process.stdout.readline())['import_ms']
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        'import_ms': import_ms,
+        'live_ms': (live - started) * 1000,
+        'ready_ms': (ready - started) * 1000,
+        'first_ms': (first - started) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', help='existing DynamoDB endpoint (default: start moto in-process)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for each launch')
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--table-suffix', default='Startup')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_moto()
+    configure_environment(endpoint, SimpleNamespace(hash_method=args.hash_method, table_suffix=args.table_suffix))
+
+    try:
+        import app as app_module
+        from schema import create_tables
+
+        create_tables(app_module.aws.dynamodb_client(), app_module.app_table_definitions())
+
+        runs = [launch(args.timeout) for _ in range(args.runs)]
+        report = {}
+        print(f"\n{args.runs} launches (ms from process start)")
+        print(f"{'':<8}{'p50':>9}{'max':>9}")
+        for key in ('import_ms', 'live_ms', 'ready_ms', 'first_ms'):
+            values = [run[key] for run in runs]
+            report[key] = {'p50': percentile(values, 50), 'max': max(values)}
+            print(f"{key[:-3]:<8}{report[key]['p50']:>9.1f}{report[key]['max']:>9.1f}")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'runs': runs, 'summary': report}, f, indent=2)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+"""Load-test MedTrack's Flask routes against a local DynamoDB stand-in.
+
+Seeds a moto server (started in-process) or an existing DynamoDB Local
+endpoint with synthetic users and appointments, drives the routes with
+concurrent simulated sessions, and reports throughput, p50/p95/p99 latency
+and DynamoDB call counts / consumed capacity per route.
+
+Usage:
+    python benchmarks/harness.py --patients 500 --doctors 50 --appointments 5000 --sessions 16
+    python benchmarks/harness.py --endpoint http://localhost:8000 --output run.json
+    python benchmarks/harness.py --baseline benchmarks/baseline.json            # exit 1 on regression
+    python benchmarks/harness.py --baseline benchmarks/baseline.json --write-baseline
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'bench-password'
+SPECIALIZATIONS = ['Cardiology', 'Dermatology', 'Neurology', 'Pediatrics', 'Orthopedics', 'General']
+FIRST_NAMES = ['Anna', 'Ben', 'Chen', 'Diya', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jon', 'Kavya', 'Liam']
+LAST_NAMES = ['Smith', 'Rao', 'Garcia', 'Kim', 'Okafor', 'Novak', 'Haddad', 'Silva', 'Tanaka', 'Murphy']
+SYMPTOMS = ['headache', 'fever', 'cough', 'back pain', 'rash', 'fatigue', 'dizziness', 'sore throat', 'nausea']
+STATUSES = ['pending', 'completed']
+
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+
+# Metrics compared against a stored baseline; a run fails if any grows past tolerance
+BASELINE_METRICS = ('p95_ms', 'ddb_calls_per_request', 'capacity_per_request')
+
+
+# ----------------------------------------
+# Local DynamoDB stand-in
+# ----------------------------------------
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SerialMotoServer:
+    """moto's server handling one request at a time.
+
+    moto's in-memory backends are not thread-safe: concurrent requests can
+    interleave inside a transaction's condition checks (or fail with
+    "dictionary changed size during iteration"), so a benchmark asserting
+    correctness under concurrency needs its requests serialized.
+    """
+
+    def __init__(self, port):
+        from moto.server import DomainDispatcherApplication, create_backend_app
+        from werkzeug.serving import make_server
+
+        self._server = make_server('127.0.0.1', port, DomainDispatcherApplication(create_backend_app), threaded=False)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._thread.join()
+
+
+def start_moto(serialized=False):
+    """Start moto's server in a background thread; returns (server, endpoint_url)."""
+    from moto.server import ThreadedMotoServer
+
+    port = free_port()
+    if serialized:
+        server = SerialMotoServer(port)
+    else:
+        server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def configure_environment(endpoint, args):
+    """Point the app at the stand-in; must run before `app` is imported."""
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ['DYNAMODB_ENDPOINT_URL'] = endpoint
+    os.environ['ENABLE_EMAIL'] = 'False'
+    os.environ['ENABLE_SNS'] = 'False'
+    # Every simulated session logs in from the same address
+    os.environ['RATE_LIMIT_ENABLED'] = 'False'
+    os.environ['PASSWORD_HASH_METHOD'] = args.hash_method
+    suffix = args.table_suffix
+    os.environ['USERS_TABLE_NAME'] = f"UsersTable{suffix}"
+    os.environ['APPOINTMENTS_TABLE_NAME'] = f"AppointmentsTable{suffix}"
+    os.environ['SEARCH_INDEX_TABLE_NAME'] = f"SearchIndexTable{suffix}"
+    os.environ['SLOTS_TABLE_NAME'] = f"SlotReservationsTable{suffix}"
+    os.environ['STATS_TABLE_NAME'] = f"UserStatsTable{suffix}"
+    os.environ['ARCHIVE_INDEX_TABLE_NAME'] = f"ArchiveIndexTable{suffix}"
+
+
+# ----------------------------------------
+# DynamoDB call recorder
+# ----------------------------------------
+
+class CallRecorder:
+    """Counts DynamoDB calls and consumed capacity, attributed to the route being driven."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.calls = defaultdict(lambda: defaultdict(int))
+        self.read_units = defaultdict(float)
+        self.write_units = defaultdict(float)
+
+    def install(self, client):
+        client.meta.events.register('provide-client-params.dynamodb.*', self._request_capacity)
+        client.meta.events.register('after-call.dynamodb.*', self._after_call)
+
+    def route(self, name):
+        self._local.route = name
+
+    def _request_capacity(self, params, model, **kwargs):
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    def _after_call(self, http_response, parsed, model, **kwargs):
+        route = getattr(self._local, 'route', None)
+        if route is None:
+            return
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        units = sum(float(c.get('CapacityUnits', 0)) for c in consumed)
+        with self._lock:
+            self.calls[route][model.name] += 1
+            if model.name in READ_OPERATIONS:
+                self.read_units[route] += units
+            else:
+                self.write_units[route] += units
+
+
+# ----------------------------------------
+# Seeding
+# ----------------------------------------
+
+def random_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def seed(app_module, args, rng):
+    """Create tables and load synthetic users and appointments; returns (patients, doctors)."""
+    from schema import create_tables
+    from search_index import postings
+    from stats import reconcile_stats
+
+    create_tables(app_module.aws.dynamodb_client(), app_module.app_table_definitions())
+    password_hash = app_module.password_hasher.hash(PASSWORD)
+
+    doctors = [{
+        'email': f"doctor{i}@bench.local",
+        'name': random_name(rng),
+        'password': password_hash,
+        'age': str(rng.randint(30, 65)),
+        'gender': rng.choice(['Male', 'Female', 'Other']),
+        'role': 'doctor',
+        'specialization': rng.choice(SPECIALIZATIONS),
+    } for i in range(args.doctors)]
+    patients = [{
+        'email': f"patient{i}@bench.local",
+        'name': random_name(rng),
+        'password': password_hash,
+        'age': str(rng.randint(18, 90)),
+        'gender': rng.choice(['Male', 'Female', 'Other']),
+        'role': 'patient',
+    } for i in range(args.patients)]
+
+    with app_module.user_table.batch_writer() as batch:
+        for user in doctors + patients:
+            batch.put_item(Item=user)
+
+    today = date.today()
+    with app_module.appointment_table.batch_writer() as batch, \
+            app_module.search_index.table.batch_writer() as index_batch:
+        for _ in range(args.appointments):
+            doctor = rng.choice(doctors)
+            patient = rng.choice(patients)
+            status = rng.choice(STATUSES)
+            appointment_date = (today - timedelta(days=rng.randint(-30, 365))).isoformat()
+            item = {
+                'appointment_id': str(uuid.uuid4()),
+                'doctor_email': doctor['email'],
+                'doctor_name': doctor['name'],
+                'patient_email': patient['email'],
+                'patient_name': patient['name'],
+                'symptoms': ', '.join(rng.sample(SYMPTOMS, 2)),
+                'status': status,
+                'appointment_date': appointment_date,
+                'status_date': f"{status}#{appointment_date}",
+                'created_at': today.isoformat(),
+            }
+            if status == 'completed':
+                item['diagnosis'] = 'Seasonal ' + rng.choice(SYMPTOMS)
+            batch.put_item(Item=item)
+            for owner in (item['doctor_email'], item['patient_email']):
+                for term_key in postings(item):
+                    index_batch.put_item(Item={'owner_email': owner, 'term_key': term_key})
+
+    reconcile_stats(app_module.appointment_table, app_module.stats_table)
+    return patients, doctors
+
+
+# ----------------------------------------
+# Load driver
+# ----------------------------------------
+
+def choose_route(rng, role):
+    if role == 'doctor':
+        return rng.choices(['dashboard', 'search_appointments'], weights=[3, 1])[0]
+    return rng.choices(['dashboard', 'search_appointments', 'book_appointment'], weights=[4, 2, 1])[0]
+
+
+def is_error(response):
+    if response.status_code >= 400:
+        return True
+    # Route-level failures redirect to logout/login with a flash message
+    location = response.headers.get('Location', '')
+    return response.status_code in (301, 302) and ('/logout' in location or '/login' in location)
+
+
+def run_session(app_module, recorder, user, doctors, args, seed_value, results):
+    rng = random.Random(seed_value)
+    client = app_module.app.test_client()
+
+    def timed(route, fn):
+        recorder.route(route)
+        start = time.perf_counter()
+        response = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        recorder.route(None)
+        results.append((route, elapsed, is_error(response)))
+
+    timed('login', lambda: client.post('/login', data={
+        'email': user['email'], 'password': PASSWORD, 'role': user['role']
+    }))
+
+    for _ in range(args.requests):
+        route = choose_route(rng, user['role'])
+        if route == 'dashboard':
+            timed(route, lambda: client.get('/dashboard'))
+        elif route == 'search_appointments':
+            term = rng.choice(FIRST_NAMES + SYMPTOMS + STATUSES)[:rng.randint(3, 6)]
+            timed(route, lambda: client.get('/search_appointments', query_string={'search_term': term}))
+        else:
+            doctor = rng.choice(doctors)
+            appointment_date = (date.today() + timedelta(days=rng.randint(1, 60))).isoformat()
+            appointment_time = f"{rng.randint(8, 17):02d}:{rng.choice(['00', '15', '30', '45'])}"
+            timed(route, lambda: client.post('/book_appointment', data={
+                'doctor_email': doctor['email'],
+                'symptoms': rng.choice(SYMPTOMS),
+                'appointment_date': appointment_date,
+                'appointment_time': appointment_time,
+                'idempotency_key': str(uuid.uuid4()),
+            }))
+
+
+def drive(app_module, recorder, patients, doctors, args, rng):
+    users = [rng.choice(doctors) if rng.random() < args.doctor_share else rng.choice(patients)
+             for _ in range(args.sessions)]
+    results = []
+    threads = [
+        threading.Thread(target=run_session,
+                         args=(app_module, recorder, user, doctors, args, rng.random(), results))
+        for user in users
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+# ----------------------------------------
+# Reporting
+# ----------------------------------------
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(results, wall_seconds, recorder, args):
+    by_route = defaultdict(list)
+    errors = defaultdict(int)
+    for route, elapsed, failed in results:
+        by_route[route].append(elapsed)
+        errors[route] += int(failed)
+
+    routes = {}
+    for route, latencies in sorted(by_route.items()):
+        count = len(latencies)
+        calls = dict(recorder.calls.get(route, {}))
+        capacity = recorder.read_units[route] + recorder.write_units[route]
+        routes[route] = {
+            'requests': count,
+            'errors': errors[route],
+            'throughput_rps': count / wall_seconds if wall_seconds else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'ddb_calls': calls,
+            'ddb_calls_per_request': sum(calls.values()) / count,
+            'read_capacity_units': recorder.read_units[route],
+            'write_capacity_units': recorder.write_units[route],
+            'capacity_per_request': capacity / count,
+        }
+    return {
+        'config': {
+            'patients': args.patients,
+            'doctors': args.doctors,
+            'appointments': args.appointments,
+            'sessions': args.sessions,
+            'requests_per_session': args.requests,
+        },
+        'wall_seconds': wall_seconds,
+        'throughput_rps': len(results) / wall_seconds if wall_seconds else 0.0,
+        'routes': routes,
+    }
+
+
+def print_report(report):
+    print(f"\nTotal: {report['throughput_rps']:.1f} req/s over {report['wall_seconds']:.2f}s")
+    print(f"{'route':<22} {'reqs':>6} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'ddb/req':>8} {'cap/req':>8}")
+    for route, r in report['routes'].items():
+        print(f"{route:<22} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['ddb_calls_per_request']:>8.2f} {r['capacity_per_request']:>8.2f}")
+        if r['ddb_calls']:
+            breakdown = ', '.join(f"{op}={n}" for op, n in sorted(r['ddb_calls'].items()))
+            print(f"{'':<22} {breakdown}")
+
+
+def compare(report, baseline, tolerance, latency_slack_ms):
+    """Return human-readable regressions of this run against a baseline report."""
+    regressions = []
+    for route, base in baseline.get('routes', {}).items():
+        current = report['routes'].get(route)
+        if current is None:
+            continue
+        for metric in BASELINE_METRICS:
+            allowed = base.get(metric, 0) * (1 + tolerance)
+            if metric.endswith('_ms'):
+                allowed += latency_slack_ms
+            if current[metric] > allowed + 1e-9:
+                regressions.append(
+                    f"{route}.{metric}: {current[metric]:.2f} > {allowed:.2f} (baseline {base.get(metric, 0):.2f})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', help='existing DynamoDB endpoint (default: start moto in-process)')
+    parser.add_argument('--patients', type=int, default=500)
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--appointments', type=int, default=5000)
+    parser.add_argument('--sessions', type=int, default=16, help='concurrent simulated sessions')
+    parser.add_argument('--requests', type=int, default=25, help='requests per session after login')
+    parser.add_argument('--doctor-share', type=float, default=0.2, help='fraction of sessions that are doctors')
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000',
+                        help='password hash method (cheap by default so login measures the DB path)')
+    parser.add_argument('--table-suffix', default='Bench')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='baseline JSON report to compare against')
+    parser.add_argument('--write-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--latency-slack-ms', type=float, default=2.0, help='absolute slack for latency metrics')
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server, endpoint = start_moto()
+    configure_environment(endpoint, args)
+
+    try:
+        import app as app_module
+
+        rng = random.Random(args.seed)
+        start = time.perf_counter()
+        patients, doctors = seed(app_module, args, rng)
+        print(f"Seeded {len(patients)} patients, {len(doctors)} doctors, "
+              f"{args.appointments} appointments in {time.perf_counter() - start:.1f}s")
+
+        recorder = CallRecorder()
+        recorder.install(app_module.aws.dynamodb().meta.client)
+        recorder.install(app_module.aws.dynamodb_client())
+        results, wall_seconds = drive(app_module, recorder, patients, doctors, args, rng)
+        report = summarize(results, wall_seconds, recorder, args)
+        print_report(report)
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if args.baseline and args.write_baseline:
+            with open(args.baseline, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nBaseline written to {args.baseline}")
+        elif args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            regressions = compare(report, baseline, args.tolerance, args.latency_slack_ms)
+            if regressions:
+                print('\nRegressions against baseline:')
+                for line in regressions:
+                    print(f"  {line}")
+                sys.exit(1)
+            print('\nNo regressions against baseline.')
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+
+from appointments import slot_reservation
+from dynamo import batch_get, iter_pages
+from hashing import hash_password
+from search_index import postings
+from validation import (
+    appointment_users_error,
+    appointment_validation_error,
+    build_appointment_item,
+    build_user_item,
+    user_validation_error,
+)
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Record readers and writers
+# ----------------------------------------
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(path, fmt=None):
+    """Pick csv or jsonl from an explicit option or the file extension."""
+    if fmt:
+        return fmt
+    return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+
+
+def read_records(path, fmt=None):
+    """Stream records from a CSV or JSON Lines file one at a time."""
+    fmt = detect_format(path, fmt)
+    with open(path, newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+# ----------------------------------------
+# Import pipeline
+# ----------------------------------------
+
+def _run_pipeline(records, validate, prepare, write, workers, chunk_size, label):
+    """Validate records, group them into chunks and write chunks on a thread pool.
+
+    At most ``workers * 2`` chunks are in flight, so memory stays bounded no
+    matter how large the input is. ``prepare`` runs on the reading thread
+    (e.g. to hash a chunk's passwords on a process pool) while earlier chunks
+    are being written. It returns the items to write and how many of the
+    chunk's records it rejected; any other record it drops is counted as skipped.
+    """
+    stats = {'rows': 0, 'written': 0, 'rejected': 0, 'skipped': 0}
+    started = time.perf_counter()
+    in_flight = deque()
+
+    def drain(limit):
+        while len(in_flight) > limit:
+            stats['written'] += in_flight.popleft().result()
+
+    def submit(chunk):
+        items, rejected = prepare(chunk)
+        stats['rejected'] += rejected
+        stats['skipped'] += len(chunk) - len(items) - rejected
+        if items:
+            in_flight.append(pool.submit(write, items))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"import-{label}") as pool:
+        chunk = []
+        for line_number, record in enumerate(records, start=1):
+            stats['rows'] += 1
+            error = validate(record)
+            if error:
+                stats['rejected'] += 1
+                logger.warning(f"{label} row {line_number} rejected: {error}")
+                continue
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                submit(chunk)
+                chunk = []
+                drain(workers * 2)
+        if chunk:
+            submit(chunk)
+        drain(0)
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    logger.info(
+        f"Imported {stats['written']} {label} ({stats['rejected']} rejected, {stats['skipped']} skipped) "
+        f"in {stats['seconds']:.1f}s, {stats['rows_per_sec']:.0f} rows/sec"
+    )
+    return stats
+
+
+def _write_items(table, items, key_names):
+    # batch_writer groups puts into 25-item BatchWriteItem calls and resends
+    # any UnprocessedItems; overwrite_by_pkeys drops duplicate keys in a buffer.
+    with table.batch_writer(overwrite_by_pkeys=key_names) as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    return len(items)
+
+
+def import_users(table, records, hash_method, workers=4, hash_workers=None, chunk_size=500):
+    """Stream user records into UsersTable, hashing passwords on a process pool.
+
+    Like registration, the import never replaces an existing account: emails
+    already in the table (one BatchGetItem per chunk, before any hashing) or
+    earlier in the file are skipped. The check is not atomic with the write,
+    so a user registering the same email mid-import can still be overwritten.
+    """
+    seen = set()
+
+    with ProcessPoolExecutor(max_workers=hash_workers) as hash_pool:
+        def prepare(chunk):
+            emails = [record['email'].lower() for record in chunk]
+            existing = {item['email'] for item in batch_get(
+                table.meta.client, table.name, [{'email': email} for email in emails],
+                projection='#e', expression_names={'#e': 'email'}
+            )}
+            new_records = []
+            for record, email in zip(chunk, emails):
+                if email in existing or email in seen:
+                    logger.warning(f"users: {email} is already registered, skipped")
+                    continue
+                seen.add(email)
+                new_records.append(record)
+
+            passwords = [record['password'] for record in new_records]
+            hashes = hash_pool.map(hash_password, passwords, [hash_method] * len(passwords), chunksize=16)
+            return [build_user_item(record, password_hash) for record, password_hash in zip(new_records, hashes)], 0
+
+        return _run_pipeline(
+            records,
+            lambda record: user_validation_error(record, confirm_password=False),
+            prepare,
+            lambda items: _write_items(table, items, ['email']),
+            workers,
+            chunk_size,
+            'users'
+        )
+
+
+def import_appointments(table, users_table, records, search_table=None, slots_table=None, workers=4,
+                        chunk_size=500):
+    """Stream appointment records into AppointmentsTable (and their search postings).
+
+    Each chunk's doctors and patients are read from ``users_table`` with one
+    BatchGetItem: rows naming an unknown doctor, a user who is not a doctor,
+    or an unknown patient are rejected, and the stored names are copied onto
+    the appointment like booking does.
+    With ``slots_table`` every appointment also gets its doctor-slot
+    reservation, written before the appointment, so imported appointments
+    block double-booking like booked ones. Rows whose slot is held by another
+    appointment, in the table (one BatchGetItem per chunk) or earlier in the
+    file, are skipped. As with users, the check is not atomic with the write.
+    """
+    claimed = {}
+
+    def prepare(chunk):
+        emails = {record[field].lower() for record in chunk for field in ('doctor_email', 'patient_email')}
+        users = {user['email']: user for user in batch_get(
+            users_table.meta.client, users_table.name, [{'email': email} for email in emails],
+            projection='#e, #n, #r', expression_names={'#e': 'email', '#n': 'name', '#r': 'role'}
+        )}
+        items = []
+        for record in chunk:
+            doctor = users.get(record['doctor_email'].lower())
+            patient = users.get(record['patient_email'].lower())
+            error = appointment_users_error(record, doctor, patient)
+            if error:
+                logger.warning(f"appointments: row for {record['patient_email']} with "
+                               f"{record['doctor_email']} rejected: {error}")
+                continue
+            items.append(build_appointment_item(record, doctor, patient))
+        rejected = len(chunk) - len(items)
+        if slots_table is None:
+            return items, rejected
+        slots = [slot_reservation(item) for item in items]
+        held = {slot['slot_id']: slot['appointment_id'] for slot in batch_get(
+            slots_table.meta.client, slots_table.name, [{'slot_id': slot['slot_id']} for slot in slots]
+        )}
+        accepted = []
+        for item, slot in zip(items, slots):
+            holder = claimed.get(slot['slot_id']) or held.get(slot['slot_id'])
+            if holder not in (None, item['appointment_id']):
+                logger.warning(f"appointments: {item['appointment_id']} skipped, slot {slot['slot_id']} "
+                               f"is held by {holder}")
+                continue
+            claimed[slot['slot_id']] = item['appointment_id']
+            accepted.append(item)
+        return accepted, rejected
+
+    def write(items):
+        if slots_table is not None:
+            _write_items(slots_table, [slot_reservation(item) for item in items], ['slot_id'])
+        written = _write_items(table, items, ['appointment_id'])
+        if search_table is not None:
+            with search_table.batch_writer(overwrite_by_pkeys=['owner_email', 'term_key']) as batch:
+                for item in items:
+                    for owner in {item['doctor_email'], item['patient_email']}:
+                        for term_key in postings(item):
+                            batch.put_item(Item={'owner_email': owner, 'term_key': term_key})
+        return written
+
+    return _run_pipeline(
+        records,
+        appointment_validation_error,
+        prepare,
+        write,
+        workers,
+        chunk_size,
+        'appointments'
+    )
+
+
+# ----------------------------------------
+# Export
+# ----------------------------------------
+
+def export_table(table, path, segments=4, fmt=None, fields=None, exclude=()):
+    """Write every item of a table to a file with a parallel segmented scan.
+
+    Each segment is scanned by its own thread and pages are written as they
+    arrive, so the table is never held in memory. CSV output needs ``fields``
+    (the column list); JSON Lines writes whole items minus ``exclude``.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv' and not fields:
+        raise ValueError('CSV export needs an explicit field list')
+    exclude = set(exclude)
+    lock = threading.Lock()
+    counts = [0] * segments
+    started = time.perf_counter()
+
+    with open(path, 'w', newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+
+        def scan_segment(segment):
+            for page in iter_pages(table.scan, Segment=segment, TotalSegments=segments):
+                items = page.get('Items', [])
+                if fmt == 'csv':
+                    rows = [{k: v for k, v in item.items() if k not in exclude} for item in items]
+                    with lock:
+                        writer.writerows(rows)
+                else:
+                    lines = ''.join(
+                        json.dumps({k: v for k, v in item.items() if k not in exclude},
+                                   default=json_default) + '\n'
+                        for item in items
+                    )
+                    with lock:
+                        f.write(lines)
+                counts[segment] += len(items)
+
+        with ThreadPoolExecutor(max_workers=segments, thread_name_prefix='export') as pool:
+            for future in [pool.submit(scan_segment, segment) for segment in range(segments)]:
+                future.result()
+
+    seconds = time.perf_counter() - started
+    rows = sum(counts)
+    stats = {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds else 0.0}
+    logger.info(f"Exported {rows} items to {path} in {seconds:.1f}s, {stats['rows_per_sec']:.0f} rows/sec")
+    return stats
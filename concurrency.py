@@ -0,0 +1,68 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import copy_current_request_context, has_request_context
+
+# ----------------------------------------
+# Concurrent fan-out of independent reads
+# ----------------------------------------
+
+
+class FanOut:
+    """Run a request's independent DynamoDB reads at the same time.
+
+    boto3 clients are thread-safe, so in concurrent mode every call but the
+    first is submitted to a shared thread pool (with a copy of the request
+    context, so ``request``/``session`` keep working) and the calling thread
+    runs the first one itself. A request then waits for its slowest read
+    rather than the sum of all of them. In sequential mode the calls simply
+    run in order, which is exactly the old behaviour. ``wrappers`` are
+    applied to each submitted call in the calling thread, e.g. to carry
+    per-request instrumentation state over to the pool thread.
+    """
+
+    def __init__(self, max_workers=32, concurrent=False, wrappers=()):
+        self.max_workers = max_workers
+        self.concurrent = concurrent
+        self.wrappers = list(wrappers)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self.batches = 0
+        self.calls = 0
+
+    def _get_executor(self):
+        # Pool threads don't survive fork(), so each worker process builds its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='fanout')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _wrap(self, fn):
+        for wrapper in self.wrappers:
+            fn = wrapper(fn)
+        return copy_current_request_context(fn) if has_request_context() else fn
+
+    def gather(self, *fns):
+        """Call each function and return their results in order."""
+        self.batches += 1
+        self.calls += len(fns)
+        if not self.concurrent or len(fns) < 2:
+            return [fn() for fn in fns]
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._wrap(fn)) for fn in fns[1:]]
+        first = fns[0]()
+        return [first] + [future.result() for future in futures]
+
+    def stats(self):
+        return {
+            'concurrent': self.concurrent,
+            'max_workers': self.max_workers,
+            'batches': self.batches,
+            'calls': self.calls,
+        }
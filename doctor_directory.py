@@ -0,0 +1,62 @@
+import logging
+
+from cache import TTLCache
+from dynamo import iter_items
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Doctor Directory
+# ----------------------------------------
+
+_ALL_DOCTORS = ('doctors', 'all')
+
+
+class DoctorDirectory:
+    """Cached listing of doctors, filled from the users table role index.
+
+    The listing is read with a paginated query on a GSI keyed by ``role`` so
+    patient rows are never touched, and is held in a TTL-bounded cache that
+    ``register()``/``profile()`` invalidate when doctor data changes.
+    """
+
+    PROJECTION = '#e, #n, specialization'
+
+    def __init__(self, table, index_name='RoleIndex', ttl=300, maxsize=256):
+        self.table = table
+        self.index_name = index_name
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.queries = 0
+        # Bumped on every reload so rendered doctor listings can be cached against it
+        self.generation = 0
+
+    def _load(self):
+        self.queries += 1
+        self.generation += 1
+        return list(iter_items(
+            self.table.query,
+            IndexName=self.index_name,
+            KeyConditionExpression="#r = :doc",
+            ProjectionExpression=self.PROJECTION,
+            ExpressionAttributeNames={"#r": "role", "#e": "email", "#n": "name"},
+            ExpressionAttributeValues={":doc": "doctor"}
+        ))
+
+    def list_doctors(self):
+        """Return every doctor, served from cache when fresh."""
+        doctors = self.cache.get(_ALL_DOCTORS)
+        if doctors is None:
+            doctors = self._load()
+            self.cache.set(_ALL_DOCTORS, doctors)
+            logger.info(f"Doctor directory refreshed: {len(doctors)} doctors")
+        return doctors
+
+    def invalidate(self):
+        """Drop the cached listing, e.g. after a doctor registers or edits their profile."""
+        self.cache.clear()
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['queries'] = self.queries
+        stats['generation'] = self.generation
+        return stats
@@ -0,0 +1,100 @@
+import random
+import time
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+# ----------------------------------------
+# DynamoDB helpers
+# ----------------------------------------
+
+def iter_pages(operation, **kwargs):
+    """Yield every page of a query/scan, following LastEvaluatedKey."""
+    while True:
+        response = operation(**kwargs)
+        yield response
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def iter_items(operation, **kwargs):
+    """Yield every item of a query/scan across all pages."""
+    for page in iter_pages(operation, **kwargs):
+        yield from page.get('Items', [])
+
+
+def query_page(operation, page_size, start_key=None, **kwargs):
+    """Run a single bounded query page; return (items, last_evaluated_key)."""
+    kwargs['Limit'] = page_size
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+    response = operation(**kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+# ----------------------------------------
+# Opaque pagination cursors
+# ----------------------------------------
+
+CURSOR_SALT = 'medtrack-cursor'
+
+
+def encode_cursor(last_key, secret_key, salt=CURSOR_SALT):
+    """Sign a LastEvaluatedKey into an opaque, URL-safe token."""
+    if not last_key:
+        return None
+    return URLSafeSerializer(secret_key, salt=salt).dumps(last_key)
+
+
+def decode_cursor(token, secret_key, salt=CURSOR_SALT):
+    """Return the ExclusiveStartKey carried by a token, or None if absent or tampered with."""
+    if not token:
+        return None
+    try:
+        last_key = URLSafeSerializer(secret_key, salt=salt).loads(token)
+    except BadSignature:
+        return None
+    return last_key if isinstance(last_key, dict) else None
+
+
+# ----------------------------------------
+# Batch reads
+# ----------------------------------------
+
+BATCH_GET_LIMIT = 100
+
+
+def batch_get(resource, table_name, keys, projection=None, expression_names=None, max_retries=8):
+    """Fetch many items by key with BatchGetItem, retrying UnprocessedKeys.
+
+    Keys are de-duplicated and split into 100-key requests. Returns the list of
+    found items in no particular order.
+    """
+    unique = []
+    seen = set()
+    for key in keys:
+        marker = tuple(sorted(key.items()))
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(key)
+
+    items = []
+    for start in range(0, len(unique), BATCH_GET_LIMIT):
+        request = {'Keys': unique[start:start + BATCH_GET_LIMIT]}
+        if projection:
+            request['ProjectionExpression'] = projection
+        if expression_names:
+            request['ExpressionAttributeNames'] = expression_names
+        pending = {table_name: request}
+        attempt = 0
+        while pending:
+            response = resource.batch_get_item(RequestItems=pending)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            pending = response.get('UnprocessedKeys') or {}
+            if pending:
+                attempt += 1
+                if attempt > max_retries:
+                    raise RuntimeError(f"BatchGetItem left unprocessed keys on {table_name}")
+                time.sleep(min(1.0, 0.05 * (2 ** attempt)) * random.random())
+    return items
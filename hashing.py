@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# ----------------------------------------
+# Password hashing executor
+# ----------------------------------------
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 429."""
+
+
+def hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def verify_password(stored_hash, password):
+    return check_password_hash(stored_hash, password)
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded process pool, off the request thread.
+
+    At most ``max_pending`` hashes may be queued or running; beyond that
+    ``HashingBusy`` is raised immediately instead of letting a login burst
+    tie up every request thread, and a hash that does not finish within
+    ``timeout`` raises it too. ``method`` is any Werkzeug method string; short
+    forms (``scrypt``, ``pbkdf2:sha256``) are expanded to the full one stored
+    in hashes (``scrypt:32768:8:1``) so stored hashes with a different cost
+    can be detected and upgraded. Workers are started with ``forkserver``,
+    not forked from the threaded app process. With ``workers=0`` hashing runs
+    inline, which is handy for local development.
+    """
+
+    def __init__(self, method='scrypt:32768:8:1', workers=None, max_pending=None,
+                 acquire_timeout=0.05, timeout=30):
+        self.method = method
+        self._stored_method = None
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(1, self.workers) * 4
+        self.acquire_timeout = acquire_timeout
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.rejected = 0
+
+    def _get_executor(self):
+        # One pool per process; a forked worker must not reuse its parent's
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Not fork: the parent runs outbox and fan-out threads whose
+                    # locks could be held, and then stuck, in a forked child
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('forkserver')
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                with self._lock:
+                    self.rejected += 1
+                raise HashingBusy()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured method."""
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Check a password against a stored hash."""
+        return self._run(verify_password, stored_hash, password)
+
+    @property
+    def stored_method(self):
+        """The method prefix Werkzeug writes for ``method``, e.g. 'scrypt' -> 'scrypt:32768:8:1'.
+
+        Expanding it costs one hash, so it is done on first use rather than
+        at import time.
+        """
+        if self._stored_method is None:
+            self._stored_method = generate_password_hash('', method=self.method).split('$', 1)[0]
+        return self._stored_method
+
+    def needs_rehash(self, stored_hash):
+        """True if a stored hash was made with a different method or cost."""
+        return stored_hash.split('$', 1)[0] != self.stored_method
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pid = None
+
+    def stats(self):
+        return {'method': self.method, 'workers': self.workers,
+                'max_pending': self.max_pending, 'rejected': self.rejected}
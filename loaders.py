@@ -0,0 +1,50 @@
+from dynamo import batch_get
+
+# ----------------------------------------
+# Request-scoped data loaders
+# ----------------------------------------
+
+_MISSING = object()
+
+
+class UserLoader:
+    """Collects user lookups for one request and resolves them with BatchGetItem.
+
+    Results (including misses) are memoized, so the same email is never read
+    from DynamoDB twice during a request. Handlers that need several users
+    ``prime()`` them up front so the first ``get()`` fetches them all in one
+    round trip (booking primes the doctor and, when the session copy is stale,
+    the patient). Handlers that write a user call ``forget()`` so later reads
+    in the same request see the new data.
+    """
+
+    def __init__(self, resource, table_name):
+        self.resource = resource
+        self.table_name = table_name
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, *emails):
+        """Register emails to be fetched with the next batch."""
+        self._pending.update(e for e in emails if e and e not in self._cache)
+
+    def load_many(self, emails):
+        """Return {email: item or None} for every email, in one round trip at most."""
+        self.prime(*emails)
+        if self._pending:
+            keys = [{'email': email} for email in self._pending]
+            found = {item['email']: item for item in batch_get(self.resource, self.table_name, keys)}
+            for email in self._pending:
+                self._cache[email] = found.get(email)
+            self._pending.clear()
+        return {email: self._cache.get(email) for email in emails if email}
+
+    def get(self, email):
+        """Return a single user item, or None."""
+        cached = self._cache.get(email, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        return self.load_many([email]).get(email)
+
+    def forget(self, email):
+        self._cache.pop(email, None)
@@ -0,0 +1,308 @@
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Metric registry (Prometheus text format)
+# ----------------------------------------
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms rendered as Prometheus text."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._gauges = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def gauge(self, name, fn):
+        """Register a callable evaluated at render time."""
+        self._gauges[name] = fn
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def counter_totals(self, name, by):
+        """Sum a counter's values grouped by one label."""
+        totals = defaultdict(float)
+        with self._lock:
+            for (metric, labels), value in self._counters.items():
+                if metric == name:
+                    totals[dict(labels).get(by)] += value
+        return totals
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._histograms.items())
+
+        seen = set()
+
+        def header(name, default_kind):
+            if name in seen:
+                return
+            seen.add(name)
+            kind, text = self._help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_label_text(labels)} {value:g}")
+
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_label_text(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_label_text(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_label_text(labels)} {count}")
+
+        for name, fn in sorted(self._gauges.items()):
+            try:
+                values = fn()
+            except Exception as e:
+                logger.warning(f"Gauge {name} failed: {e}")
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            header(name, 'gauge')
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{_label_text(labels)} {value:g}")
+
+        return '\n'.join(lines) + '\n'
+
+
+# ----------------------------------------
+# Request and AWS call instrumentation
+# ----------------------------------------
+
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+
+
+def _table_label(params):
+    """Table name(s) a call touches; batch and transactional calls list theirs comma-separated."""
+    if 'TableName' in params:
+        return params['TableName']
+    if 'RequestItems' in params:
+        tables = params['RequestItems']
+    else:
+        tables = {
+            action.get('TableName')
+            for item in params.get('TransactItems', [])
+            for action in item.values()
+            if isinstance(action, dict)
+        }
+    return ','.join(sorted(table for table in tables if table))
+
+
+class Instrumentation:
+    """Times Flask routes and every AWS call made while serving them.
+
+    DynamoDB and SNS calls are observed through botocore event hooks, so
+    table operations, batch and transactional calls are all covered without
+    wrapping call sites; DynamoDB calls also request ``ReturnConsumedCapacity``.
+    Calls made during a request are kept per thread so the slow-request
+    sampler can log a breakdown of where the time went.
+    """
+
+    def __init__(self, registry=None, slow_request_ms=0, slow_sample_rate=1.0):
+        self.registry = registry or MetricsRegistry()
+        self.slow_request_ms = slow_request_ms
+        self.slow_sample_rate = slow_sample_rate
+        self._local = threading.local()
+        r = self.registry
+        r.describe('medtrack_request_duration_seconds', 'histogram', 'Flask route latency')
+        r.describe('medtrack_requests_total', 'counter', 'Requests served by route and status')
+        r.describe('medtrack_aws_call_duration_seconds', 'histogram', 'AWS API call latency')
+        r.describe('medtrack_aws_calls_total', 'counter', 'AWS API calls by service, operation and table')
+        r.describe('medtrack_aws_errors_total', 'counter', 'AWS API call errors by error code')
+        r.describe('medtrack_dynamodb_consumed_capacity_total', 'counter', 'DynamoDB capacity units consumed')
+        r.describe('medtrack_notification_duration_seconds', 'histogram', 'Email/SNS delivery latency')
+        r.describe('medtrack_notifications_total', 'counter', 'Notification deliveries by kind and outcome')
+        r.describe('medtrack_rate_limit_decisions_total', 'counter', 'Rate limiter decisions by rule and outcome')
+        r.describe('medtrack_dynamodb_scan_query_ratio', 'gauge', 'Scan calls per Query call')
+        r.gauge('medtrack_dynamodb_scan_query_ratio', self._scan_query_ratio)
+
+    # -- Flask ------------------------------------------------------------
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        self._local.calls = []
+        self._local.started = time.perf_counter()
+        self._local.status = 500
+
+    def _after_request(self, response):
+        self._local.status = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        from flask import request
+
+        started = getattr(self._local, 'started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        route = request.endpoint or 'unmatched'
+        status = self._local.status if exc is None else 500
+        self.registry.observe('medtrack_request_duration_seconds', elapsed, route=route)
+        self.registry.inc('medtrack_requests_total', route=route, method=request.method, status=status)
+        calls = self._local.calls
+        self._local.calls = None
+        self._local.started = None
+        if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms \
+                and random.random() < self.slow_sample_rate:
+            self._log_slow_request(route, request.method, elapsed, calls)
+
+    def _log_slow_request(self, route, method, elapsed, calls):
+        aws_total = sum(ms for _, _, _, ms in calls)
+        breakdown = '; '.join(f"{service}.{op}({table}) {ms:.1f}ms" for service, op, table, ms in calls)
+        logger.warning(
+            f"Slow request {method} {route}: {elapsed * 1000:.1f}ms, "
+            f"{len(calls)} AWS calls {aws_total:.1f}ms [{breakdown}]"
+        )
+
+    def propagate(self, fn):
+        """Wrap fn so AWS calls it makes on another thread count toward the current request."""
+        calls = getattr(self._local, 'calls', None)
+        if calls is None:
+            return fn
+
+        def run(*args, **kwargs):
+            self._local.calls = calls
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.calls = None
+        return run
+
+    # -- botocore ---------------------------------------------------------
+
+    def install_client(self, client):
+        """Attach timing/capacity hooks to a boto3 client."""
+        events = client.meta.events
+        events.register('provide-client-params', self._provide_params)
+        events.register('after-call', self._after_call)
+        events.register('after-call-error', self._after_call_error)
+
+    def _provide_params(self, params, model, context, **kwargs):
+        context['medtrack_table'] = _table_label(params)
+        context['medtrack_started'] = time.perf_counter()
+        if model.service_model.service_name == 'dynamodb' and 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    def _record_call(self, service, operation, context):
+        started = context.get('medtrack_started')
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        table = context.get('medtrack_table', '')
+        self.registry.observe('medtrack_aws_call_duration_seconds', elapsed,
+                              service=service, operation=operation)
+        self.registry.inc('medtrack_aws_calls_total', service=service, operation=operation, table=table)
+        calls = getattr(self._local, 'calls', None)
+        if calls is not None:
+            calls.append((service, operation, table, elapsed * 1000))
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        # Service errors (throttles, failed conditions, cancelled transactions)
+        # arrive here with a parsed Error; after-call-error only sees
+        # transport exceptions such as timeouts.
+        service = model.service_model.service_name
+        self._record_call(service, model.name, context)
+        if http_response.status_code >= 300 or 'Error' in parsed:
+            code = parsed.get('Error', {}).get('Code') or str(http_response.status_code)
+            self.registry.inc('medtrack_aws_errors_total', service=service, operation=model.name, code=code)
+            return
+        if service != 'dynamodb':
+            return
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        for entry in consumed:
+            self.registry.inc(
+                'medtrack_dynamodb_consumed_capacity_total',
+                float(entry.get('CapacityUnits', 0)),
+                operation=model.name,
+                table=entry.get('TableName', context.get('medtrack_table', '')),
+                kind='read' if model.name in READ_OPERATIONS else 'write'
+            )
+
+    def _after_call_error(self, exception, context, event_name, **kwargs):
+        # event_name is "after-call-error.<service>.<operation>"
+        _, service, operation = event_name.split('.', 2)
+        self._record_call(service.lower(), operation, context)
+        # Transport errors may carry response=None (e.g. botocore's ReadTimeoutError)
+        response = getattr(exception, 'response', None) or {}
+        code = response.get('Error', {}).get('Code', type(exception).__name__)
+        self.registry.inc('medtrack_aws_errors_total', service=service.lower(), operation=operation, code=code)
+
+    def _scan_query_ratio(self):
+        totals = self.registry.counter_totals('medtrack_aws_calls_total', by='operation')
+        queries = totals.get('Query', 0)
+        return totals.get('Scan', 0) / queries if queries else float(totals.get('Scan', 0))
+
+    # -- notifications ----------------------------------------------------
+
+    def record_notification(self, kind, seconds, ok):
+        """Outbox delivery callback: times send_email()/sns.publish deliveries."""
+        self.registry.observe('medtrack_notification_duration_seconds', seconds, kind=kind)
+        self.registry.inc('medtrack_notifications_total', kind=kind, outcome='sent' if ok else 'failed')
+
+    # -- rate limiting ----------------------------------------------------
+
+    def record_rate_limit(self, rule, allowed):
+        """RateLimiter decision callback."""
+        self.registry.inc('medtrack_rate_limit_decisions_total', rule=rule,
+                          outcome='allowed' if allowed else 'limited')
+
+    def render(self):
+        return self.registry.render()
@@ -0,0 +1,291 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+logger = logging.getLogger(__name__)
+dead_letter_logger = logging.getLogger('medtrack.deadletter')
+
+# ----------------------------------------
+# SMTP connection handling
+# ----------------------------------------
+
+class SMTPConnection:
+    """A persistent SMTP session that reconnects when the server drops it."""
+
+    def __init__(self, host, port, sender, username=None, password=None, starttls=True, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server = None
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self._server = server
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            pass
+        self._server = None
+
+    def send(self, to_email, subject, body):
+        """Send one message, reconnecting once if the cached session went stale."""
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        for attempt in (1, 2):
+            if self._server is None:
+                self._connect()
+            try:
+                self._server.sendmail(self.sender, to_email, msg.as_string())
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+
+def is_permanent_failure(exc):
+    """True for SMTP rejections that retrying cannot fix (5xx replies)."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 500 <= exc.smtp_code < 600
+    return False
+
+
+class SMTPConnectionPool:
+    """Fixed-size pool of persistent SMTP connections shared by the delivery workers."""
+
+    def __init__(self, size, **settings):
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(SMTPConnection(**settings))
+
+    def send(self, to_email, subject, body):
+        conn = self._idle.get()
+        try:
+            conn.send(to_email, subject, body)
+        except Exception:
+            conn.close()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ----------------------------------------
+# Notification outbox
+# ----------------------------------------
+
+class NotificationOutbox:
+    """Background delivery of email and SNS notifications.
+
+    Request handlers only enqueue. A small pool of worker threads drains a
+    bounded queue, sending mail over pooled SMTP connections and publishing
+    with a single reused SNS client. Failed deliveries are retried with
+    exponential backoff and jitter; jobs that exhaust their attempts, that the
+    mail server rejects outright (5xx), or that arrive while the queue is full
+    are dead-lettered without further retries. The dead-letter log
+    only names the job (id, recipient, subject); message bodies can carry
+    diagnoses, so they are kept in the owner-only ``dead_letter_path`` file.
+    """
+
+    def __init__(self, smtp_settings, sns_client, topic_arn=None, workers=2, queue_size=1000,
+                 max_attempts=5, base_delay=0.5, max_delay=30, dead_letter_path=None, on_delivery=None):
+        self.smtp_settings = smtp_settings
+        self.sns_client = sns_client
+        self.topic_arn = topic_arn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_path = dead_letter_path
+        self.on_delivery = on_delivery
+        self._lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._smtp_pool = None
+        self._threads = []
+        self._pending_retries = 0
+        self.counters = {'enqueued': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0}
+
+    # -- lifecycle --------------------------------------------------------
+
+    def _ensure_started(self):
+        # Started lazily and per process so pre-fork servers never share
+        # worker threads or SMTP sockets with their parent.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._smtp_pool = SMTPConnectionPool(self.workers, **self.smtp_settings)
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"notify-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        """Drain pending jobs for up to ``timeout`` seconds, then stop the workers."""
+        if self._pid != os.getpid():
+            return
+        self.join(timeout)
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        self._smtp_pool.close()
+        self._pid = None
+
+    def join(self, timeout=None):
+        """Wait until the queue and any scheduled retries have drained."""
+        if self._queue is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks or self._pending_retries:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # -- producers --------------------------------------------------------
+
+    def send_email(self, to_email, subject, body):
+        """Queue an email; returns False if it was dead-lettered instead."""
+        return self._enqueue({'id': str(uuid.uuid4()), 'kind': 'email', 'to': to_email, 'subject': subject,
+                              'body': body})
+
+    def publish(self, message, subject):
+        """Queue an SNS publish; returns False if it was dead-lettered instead."""
+        return self._enqueue({'id': str(uuid.uuid4()), 'kind': 'sns', 'message': message, 'subject': subject})
+
+    def _enqueue(self, job, attempt=1):
+        self._ensure_started()
+        job['attempt'] = attempt
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._dead_letter(job, 'queue full')
+            return False
+        if attempt == 1:
+            self._count('enqueued')
+        return True
+
+    def _count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    # -- consumers --------------------------------------------------------
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._deliver(job)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, job):
+        started = time.perf_counter()
+        try:
+            if job['kind'] == 'email':
+                self._smtp_pool.send(job['to'], job['subject'], job['body'])
+                logger.info(f"Email sent to {job['to']}")
+            else:
+                response = self.sns_client().publish(
+                    TopicArn=self.topic_arn,
+                    Message=job['message'],
+                    Subject=job['subject']
+                )
+                logger.info(f"SNS published: {response['MessageId']}")
+            self._count('sent')
+            self._observe(job, started, True)
+        except Exception as e:
+            self._observe(job, started, False)
+            attempt = job['attempt']
+            if attempt >= self.max_attempts or is_permanent_failure(e):
+                self._dead_letter(job, str(e))
+                return
+            delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+            delay = random.uniform(0, delay)
+            logger.warning(f"{job['kind']} delivery failed (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+            self._count('retried')
+            with self._lock:
+                self._pending_retries += 1
+            timer = threading.Timer(delay, self._retry, args=(job, attempt + 1))
+            timer.daemon = True
+            timer.start()
+
+    def _observe(self, job, started, ok):
+        if self.on_delivery is not None:
+            self.on_delivery(job['kind'], time.perf_counter() - started, ok)
+
+    def _retry(self, job, attempt):
+        try:
+            self._enqueue(job, attempt)
+        finally:
+            with self._lock:
+                self._pending_retries -= 1
+
+    def _dead_letter(self, job, reason):
+        self._count('dead_lettered')
+        record = dict(job, reason=reason, failed_at=datetime.utcnow().isoformat())
+        recipient = job.get('to') or self.topic_arn
+        dead_letter_logger.error(
+            f"Notification dead-lettered: id={job['id']} kind={job['kind']} to={recipient} "
+            f"subject={job['subject']!r} attempt={job['attempt']} reason={reason}"
+        )
+        if self.dead_letter_path:
+            try:
+                # Full records (bodies included) only ever go to an owner-only file
+                fd = os.open(self.dead_letter_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                with self._lock, open(fd, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                logger.error(f"Failed to write dead-letter file: {e}")
+
+    def stats(self):
+        with self._counters_lock:
+            stats = dict(self.counters)
+        stats['queued'] = self._queue.qsize() if self._queue is not None else 0
+        return stats
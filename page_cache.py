@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import os
+import threading
+
+from flask import make_response, render_template, request, session
+from markupsafe import Markup
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Rendered page cache
+# ----------------------------------------
+
+
+class PageCache:
+    """Pages that only depend on the login state, rendered once per variant.
+
+    Used for the landing page and the 404/500 pages. Requests with pending
+    flash messages always render fresh (the messages are part of the page)
+    and are never stored. Successful pages carry an ETag, so repeat visitors
+    get a 304 with no body.
+    """
+
+    def __init__(self, max_age=300, ttl=3600, maxsize=64):
+        self.max_age = max_age
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def render(self, template, status=200, **context):
+        cacheable = '_flashes' not in session
+        logged_in = 'email' in session
+        key = (template, status, logged_in)
+        entry = self.cache.get(key) if cacheable else None
+        if entry is None:
+            body = render_template(template, **context)
+            entry = (body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+            if cacheable:
+                self.cache.set(key, entry)
+
+        response = make_response(entry[0], status)
+        if status == 200 and cacheable:
+            response.set_etag(entry[1])
+            if logged_in:
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            else:
+                response.cache_control.public = True
+                response.cache_control.max_age = self.max_age
+            response.vary.add('Cookie')
+            response.make_conditional(request)
+        return response
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+# ----------------------------------------
+# Dashboard fragment cache
+# ----------------------------------------
+
+
+class FragmentCache:
+    """Rendered template fragments keyed by their owner's data version.
+
+    Callers put the version of the data a fragment shows into its key (a
+    user's stats ``data_version``, the doctor directory generation), so a
+    write that bumps the version makes the old fragment unreachable and
+    only the affected users re-render. The TTL just bounds memory and any
+    drift from writes that bypass the counters.
+    """
+
+    def __init__(self, ttl=300, maxsize=2048):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def render(self, key, template, store=True, **context):
+        """Render a fragment and cache it under key unless ``store`` is False."""
+        html = Markup(render_template(template, **context))
+        if store:
+            self.cache.set(key, html)
+        return html
+
+    def stats(self):
+        return self.cache.stats()
+
+
+# ----------------------------------------
+# Content-hashed static URLs
+# ----------------------------------------
+
+
+class StaticAssetVersions:
+    """Append a content hash to static URLs and serve those URLs as immutable.
+
+    ``url_for('static', filename=...)`` gains a ``v=<hash>`` argument, so a
+    changed file gets a new URL and the old one can be cached by browsers
+    and CDNs for a year without ever going stale.
+    """
+
+    def __init__(self, app=None, max_age=31536000):
+        self.max_age = max_age
+        self.static_folder = None
+        self._versions = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        app.url_defaults(self._add_version)
+        app.after_request(self._cache_headers)
+
+    def version(self, filename):
+        """Return a short content hash for a static file, or None if it doesn't exist."""
+        path = os.path.join(self.static_folder, filename)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._versions.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._versions[filename] = (mtime, digest)
+        return digest
+
+    def _add_version(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            digest = self.version(values['filename'])
+            if digest:
+                values['v'] = digest
+
+    def _cache_headers(self, response):
+        if request.endpoint == 'static' and request.args.get('v') and response.status_code in (200, 304):
+            response.headers['Cache-Control'] = f"public, max-age={self.max_age}, immutable"
+        return response
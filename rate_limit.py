@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Token-bucket rate limiting
+# ----------------------------------------
+
+
+class RateLimited(Exception):
+    """Raised when a rate limit is exhausted; callers should answer 429."""
+
+    def __init__(self, limit, retry_after):
+        super().__init__(f"Rate limit {limit} exceeded, retry in {retry_after:.1f}s")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class RateLimit:
+    """A named bucket rule: ``capacity`` attempts, refilled evenly over ``period`` seconds."""
+
+    __slots__ = ('name', 'capacity', 'period')
+
+    def __init__(self, name, capacity, period):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+
+    @property
+    def rate(self):
+        """Tokens added per second."""
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, name, spec):
+        """Build a rule from a ``"<count>/<seconds>"`` string such as ``"10/300"``."""
+        count, _, seconds = spec.partition('/')
+        return cls(name, int(count), float(seconds or 60))
+
+    def __repr__(self):
+        return f"RateLimit({self.name!r}, {self.capacity}/{self.period:g}s)"
+
+
+class MemoryBucketStore:
+    """Token buckets in a sharded in-process dict.
+
+    Each shard has its own lock, so concurrent requests for different keys
+    rarely contend, and keeps at most ``max_keys / shards`` buckets, evicting
+    the least recently used. An evicted bucket simply starts full again.
+    State is per process; use RedisBucketStore to share limits across workers.
+    """
+
+    def __init__(self, shards=16, max_keys=100000):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self.evictions = 0
+
+    def take(self, key, capacity, rate, cost=1):
+        """Spend ``cost`` tokens from key's bucket; returns (allowed, tokens_left)."""
+        now = time.monotonic()
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            tokens, updated = buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            buckets[key] = (tokens, now)
+            while len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+                self.evictions += 1
+        return allowed, tokens
+
+    def stats(self):
+        return {
+            'backend': 'memory',
+            'shards': len(self._shards),
+            'keys': sum(len(buckets) for _, buckets in self._shards),
+            'evictions': self.evictions,
+        }
+
+
+# Refill and spend in one round trip; the key expires once it would be full again
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets in Redis (or any server speaking its protocol and Lua), shared by all workers.
+
+    ``client`` is a redis-py compatible client. Each take is one atomic
+    script call. Timestamps come from the caller's wall clock, so workers
+    should share a host or run NTP.
+    """
+
+    def __init__(self, client, prefix='medtrack:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_REDIS_TAKE)
+
+    def take(self, key, capacity, rate, cost=1):
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[capacity, rate, time.time(), cost])
+        return bool(int(allowed)), float(tokens)
+
+    def stats(self):
+        return {'backend': 'redis', 'prefix': self.prefix}
+
+
+def bucket_store_from_url(url):
+    """Build a bucket store from ``memory://`` or a ``redis://``/``rediss://``/``unix://`` URL."""
+    if not url or url.startswith('memory://'):
+        return MemoryBucketStore()
+    try:
+        import redis
+    except ImportError as e:
+        raise ImportError(f"RATE_LIMIT_STORAGE_URL={url} needs the redis package (pip install redis)") from e
+    return RedisBucketStore(redis.Redis.from_url(url))
+
+
+class RateLimiter:
+    """Checks token-bucket limits keyed by rule name and caller identity.
+
+    ``hit()`` is meant to run before any database or hashing work, so a
+    throttled request costs a dict lookup (or one Redis call). If the store
+    itself fails the request is allowed: an outage of a shared store must not
+    lock every user out. ``on_decision(rule, allowed)`` feeds metrics.
+    """
+
+    def __init__(self, store, limits, enabled=True, on_decision=None):
+        self.store = store
+        self.limits = {limit.name: limit for limit in limits}
+        self.enabled = enabled
+        self.on_decision = on_decision
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, *checks):
+        """Spend one token per ``(rule_name, key)`` pair, raising RateLimited on the first empty bucket."""
+        if not self.enabled:
+            return
+        for name, key in checks:
+            if not key:
+                continue
+            limit = self.limits[name]
+            try:
+                allowed, tokens = self.store.take(f"{name}:{key}", limit.capacity, limit.rate)
+            except Exception as e:
+                logger.warning(f"Rate limit store unavailable, allowing {name}: {e}")
+                continue
+            if self.on_decision:
+                self.on_decision(name, allowed)
+            if allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+                raise RateLimited(limit, max(1.0, (1 - tokens) / limit.rate))
+
+    def stats(self):
+        stats = {
+            'enabled': self.enabled,
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'limits': {name: f"{l.capacity}/{l.period:g}s" for name, l in self.limits.items()},
+        }
+        stats.update(self.store.stats())
+        return stats
@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Warm-up and readiness
+# ----------------------------------------
+
+
+class Readiness:
+    """Background warm-up and cached readiness checks for /health/ready.
+
+    ``checks`` are ``(name, fn)`` pairs; a check passes if ``fn()`` returns
+    without raising. ``warm_up()`` runs them once on a daemon thread, so
+    building boto3 clients and opening the first connections happens before
+    traffic arrives rather than on the first request. ``check()`` reruns
+    them at most every ``ttl`` seconds; a probe that arrives while a run is
+    in progress gets the last result instead of waiting on it.
+    """
+
+    def __init__(self, checks, ttl=10):
+        self.checks = list(checks)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._warmup_pid = None
+        self._result = None
+        self._checked_at = None
+        self.ready_after = None
+
+    def warm_up(self):
+        """Start the checks on a background thread, once per process."""
+        if self._warmup_pid == os.getpid():
+            return
+        self._warmup_pid = os.getpid()
+        self._started = time.monotonic()
+        self._result = self._checked_at = self.ready_after = None
+        threading.Thread(target=self.check, name='warmup', daemon=True).start()
+
+    def _run_checks(self):
+        results = {}
+        for name, fn in self.checks:
+            try:
+                fn()
+                results[name] = 'ok'
+            except Exception as e:
+                logger.warning(f"Readiness check {name} failed: {e}")
+                results[name] = type(e).__name__
+        return all(value == 'ok' for value in results.values()), results
+
+    def check(self):
+        """Return (ready, details), running the checks if the cached result is stale."""
+        fresh = self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl
+        if not fresh and self._lock.acquire(blocking=False):
+            try:
+                ready, results = self._run_checks()
+                self._result = (ready, results)
+                self._checked_at = time.monotonic()
+                if ready and self.ready_after is None:
+                    self.ready_after = self._checked_at - self._started
+                    logger.info(f"Ready {self.ready_after * 1000:.0f}ms after start")
+            finally:
+                self._lock.release()
+        if self._result is None:
+            return False, {'status': 'warming up'}
+        return self._result
+
+    def stats(self):
+        return {
+            'ready': bool(self._result and self._result[0]),
+            'ready_after_ms': None if self.ready_after is None else round(self.ready_after * 1000, 1),
+        }
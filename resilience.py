@@ -0,0 +1,203 @@
+import logging
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Error classification
+# ----------------------------------------
+
+THROTTLE_ERROR_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+}
+
+TRANSIENT_ERROR_CODES = {
+    'InternalServerError',
+    'InternalFailure',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+}
+
+ERROR_THROTTLE = 'throttle'
+ERROR_TRANSIENT = 'transient'
+ERROR_MISSING_INDEX = 'missing_index'
+ERROR_OTHER = 'error'
+
+
+def classify_error(exc):
+    """Tell throttling and transient outages apart from a missing table/index and everything else.
+
+    Timeouts, connection failures and 5xx responses are transient: botocore
+    has already retried them, so they count against the dependency's health.
+    """
+    if isinstance(exc, (BotoConnectionError, HTTPClientError)):
+        return ERROR_TRANSIENT
+    if not isinstance(exc, ClientError):
+        return ERROR_OTHER
+    error = exc.response.get('Error', {})
+    code = error.get('Code', '')
+    if code in THROTTLE_ERROR_CODES:
+        return ERROR_THROTTLE
+    if code in TRANSIENT_ERROR_CODES or exc.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500:
+        return ERROR_TRANSIENT
+    if code == 'ResourceNotFoundException':
+        return ERROR_MISSING_INDEX
+    if code == 'ValidationException' and 'index' in error.get('Message', '').lower():
+        return ERROR_MISSING_INDEX
+    return ERROR_OTHER
+
+
+# ----------------------------------------
+# Circuit breaker
+# ----------------------------------------
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for ``reset_timeout`` seconds.
+
+    After ``failure_threshold`` consecutive failures the breaker opens; once
+    the timeout passes a single probe call is let through (half-open), and its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Return True if a call may go through right now."""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release(self):
+        """End a probe whose outcome says nothing about the dependency's health."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._state != STATE_OPEN:
+                    self.trips += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def snapshot(self):
+        state = self.state
+        with self._lock:
+            return {'state': state, 'failures': self._failures, 'trips': self.trips}
+
+
+# ----------------------------------------
+# Guarded reads with degraded mode
+# ----------------------------------------
+
+class ReadUnavailable(Exception):
+    """Raised when a guarded read failed and no cached result can stand in."""
+
+
+class GuardedReader:
+    """Runs index reads behind per-dependency circuit breakers.
+
+    Throttles are retried with full-jitter backoff. Throttles, timeouts,
+    connection errors and 5xx responses count as breaker failures. Successful
+    results are kept in a short-lived cache so that, while a breaker is open
+    or a read keeps failing, the caller gets the last good result instead of
+    falling back to a table scan.
+    """
+
+    def __init__(self, cache, failure_threshold=5, reset_timeout=30, max_retries=3, base_delay=0.05):
+        self.cache = cache
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, name):
+        with self._lock:
+            breaker = self.breakers.get(name)
+            if breaker is None:
+                breaker = self.breakers[name] = CircuitBreaker(
+                    name, failure_threshold=self.failure_threshold, reset_timeout=self.reset_timeout
+                )
+            return breaker
+
+    def read(self, name, cache_key, fn):
+        """Return (result, degraded) for ``fn()``, guarded by breaker ``name``."""
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            return self._fallback(name, cache_key, 'circuit open')
+
+        attempt = 0
+        while True:
+            try:
+                result = fn()
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == ERROR_THROTTLE and attempt < self.max_retries:
+                    attempt += 1
+                    time.sleep(random.uniform(0, self.base_delay * (2 ** attempt)))
+                    continue
+                if kind == ERROR_OTHER:
+                    breaker.release()
+                    raise
+                if kind == ERROR_MISSING_INDEX:
+                    logger.error(f"Index unavailable for '{name}': {e}")
+                breaker.record_failure()
+                return self._fallback(name, cache_key, kind)
+            breaker.record_success()
+            self.cache.set(cache_key, result)
+            return result, False
+
+    def _fallback(self, name, cache_key, reason):
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            raise ReadUnavailable(f"{name}: {reason}")
+        logger.warning(f"Serving cached result for '{name}' ({reason})")
+        return cached, True
+
+    def snapshot(self):
+        with self._lock:
+            breakers = list(self.breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,135 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# DynamoDB table definitions
+# ----------------------------------------
+# Used by `flask create-tables` and the benchmark harness to provision the
+# tables and GSIs the app expects on DynamoDB Local, moto or a fresh account.
+
+
+def _gsi(name, hash_key, range_key=None, projection=None):
+    key_schema = [{'AttributeName': hash_key, 'KeyType': 'HASH'}]
+    if range_key:
+        key_schema.append({'AttributeName': range_key, 'KeyType': 'RANGE'})
+    return {
+        'IndexName': name,
+        'KeySchema': key_schema,
+        'Projection': projection or {'ProjectionType': 'ALL'},
+    }
+
+
+# Non-key attributes the appointment GSIs carry: just what list views render
+# (see appointments.SUMMARY_FIELDS), so index reads and index storage skip the
+# diagnosis/treatment/prescription text. Key attributes are projected anyway.
+APPOINTMENT_SUMMARY_ATTRIBUTES = ['doctor_name', 'patient_name', 'appointment_date', 'symptoms', 'status']
+
+
+def _summary_gsi(name, hash_key, range_key):
+    return _gsi(name, hash_key, range_key, {
+        'ProjectionType': 'INCLUDE',
+        'NonKeyAttributes': [a for a in APPOINTMENT_SUMMARY_ATTRIBUTES if a not in (hash_key, range_key)],
+    })
+
+
+def _attributes(*names):
+    return [{'AttributeName': name, 'AttributeType': 'S'} for name in names]
+
+
+def table_definitions(users_table, appointments_table, search_index_table, slots_table, stats_table,
+                      archive_index_table, role_index='RoleIndex', doctor_status_index='DoctorStatusIndex'):
+    """Return create_table kwargs for every table the app reads or writes.
+
+    A ``TimeToLiveAttribute`` entry is not a create_table argument; create_tables
+    enables TTL on that attribute separately.
+    """
+    return [
+        {
+            'TableName': users_table,
+            'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+            'AttributeDefinitions': _attributes('email', 'role'),
+            'GlobalSecondaryIndexes': [
+                _gsi(role_index, 'role', 'email', {
+                    'ProjectionType': 'INCLUDE',
+                    'NonKeyAttributes': ['name', 'specialization'],
+                }),
+            ],
+        },
+        {
+            'TableName': appointments_table,
+            'KeySchema': [{'AttributeName': 'appointment_id', 'KeyType': 'HASH'}],
+            'AttributeDefinitions': _attributes(
+                'appointment_id', 'doctor_email', 'patient_email', 'appointment_date', 'status_date'
+            ),
+            'GlobalSecondaryIndexes': [
+                _summary_gsi('DoctorEmailIndex', 'doctor_email', 'appointment_date'),
+                _summary_gsi('PatientEmailIndex', 'patient_email', 'appointment_date'),
+                _summary_gsi(doctor_status_index, 'doctor_email', 'status_date'),
+            ],
+            'TimeToLiveAttribute': 'expires_at',
+        },
+        {
+            'TableName': search_index_table,
+            'KeySchema': [
+                {'AttributeName': 'owner_email', 'KeyType': 'HASH'},
+                {'AttributeName': 'term_key', 'KeyType': 'RANGE'},
+            ],
+            'AttributeDefinitions': _attributes('owner_email', 'term_key'),
+        },
+        {
+            'TableName': slots_table,
+            'KeySchema': [{'AttributeName': 'slot_id', 'KeyType': 'HASH'}],
+            'AttributeDefinitions': _attributes('slot_id'),
+        },
+        {
+            'TableName': stats_table,
+            'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+            'AttributeDefinitions': _attributes('email'),
+        },
+        {
+            'TableName': archive_index_table,
+            'KeySchema': [{'AttributeName': 'appointment_id', 'KeyType': 'HASH'}],
+            'AttributeDefinitions': _attributes('appointment_id'),
+        },
+    ]
+
+
+def enable_ttl(client, table_name, attribute):
+    """Turn on DynamoDB TTL for a table unless it is already on."""
+    description = client.describe_time_to_live(TableName=table_name).get('TimeToLiveDescription', {})
+    if description.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        return
+    client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute}
+    )
+    logger.info(f"Enabled TTL on {table_name}.{attribute}")
+
+
+def create_tables(client, definitions, wait=True):
+    """Create any missing tables (on-demand billing); existing ones are left alone.
+
+    TTL is enabled on every table that declares a ``TimeToLiveAttribute``,
+    including existing ones, once they are active (so only with ``wait``).
+    """
+    existing = set(client.list_tables().get('TableNames', []))
+    created = []
+    for definition in definitions:
+        definition = dict(definition)
+        definition.pop('TimeToLiveAttribute', None)
+        name = definition['TableName']
+        if name in existing:
+            logger.info(f"Table {name} already exists")
+            continue
+        client.create_table(BillingMode='PAY_PER_REQUEST', **definition)
+        created.append(name)
+        logger.info(f"Created table {name}")
+    if wait:
+        waiter = client.get_waiter('table_exists')
+        for name in created:
+            waiter.wait(TableName=name)
+        for definition in definitions:
+            if definition.get('TimeToLiveAttribute'):
+                enable_ttl(client, definition['TableName'], definition['TimeToLiveAttribute'])
+    return created
@@ -0,0 +1,126 @@
+import logging
+import re
+
+from dynamo import iter_items
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Appointment search index
+# ----------------------------------------
+
+# Indexed fields and their ranking weights
+SEARCH_FIELDS = {
+    'patient_name': 3,
+    'doctor_name': 3,
+    'status': 2,
+    'diagnosis': 1,
+    'symptoms': 1,
+}
+
+# Owners whose partition an appointment is indexed into
+OWNER_FIELDS = ('doctor_email', 'patient_email')
+
+MAX_TOKENS_PER_FIELD = 64
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens, preserving first-seen order."""
+    tokens = []
+    seen = set()
+    for token in _TOKEN_RE.findall(str(text or '').lower()):
+        if token not in seen:
+            seen.add(token)
+            tokens.append(token)
+    return tokens
+
+
+def postings(item):
+    """Return the set of term keys an appointment contributes to the index."""
+    appointment_id = item['appointment_id']
+    keys = set()
+    for field in SEARCH_FIELDS:
+        for token in tokenize(item.get(field))[:MAX_TOKENS_PER_FIELD]:
+            keys.add(f"{token}#{appointment_id}#{field}")
+    return keys
+
+
+class SearchIndex:
+    """Inverted index over appointments, stored in its own DynamoDB table.
+
+    Items are partitioned by ``owner_email`` (the doctor and the patient of
+    each appointment), so a search only ever reads the caller's own
+    partition. The sort key ``term_key`` is ``<token>#<appointment_id>#<field>``
+    with lowercase tokens, which makes case-insensitive prefix matching a
+    single ``begins_with`` key condition per query token.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def index_appointment(self, item, previous=None):
+        """Add or refresh an appointment's postings, removing ones that no longer apply."""
+        self.index_appointments([(item, previous)])
+
+    def index_appointments(self, changes):
+        """Apply many ``(item, previous)`` updates through one batch writer."""
+        with self.table.batch_writer() as batch:
+            for item, previous in changes:
+                new_keys = postings(item)
+                old_keys = postings(previous) if previous else set()
+                for owner in {item.get(field) for field in OWNER_FIELDS if item.get(field)}:
+                    for term_key in old_keys - new_keys:
+                        batch.delete_item(Key={'owner_email': owner, 'term_key': term_key})
+                    for term_key in new_keys - old_keys:
+                        batch.put_item(Item={'owner_email': owner, 'term_key': term_key})
+
+    def remove_appointments(self, items):
+        """Delete every posting of the given appointments (e.g. once they are archived)."""
+        with self.table.batch_writer(overwrite_by_pkeys=['owner_email', 'term_key']) as batch:
+            for item in items:
+                for owner in {item.get(field) for field in OWNER_FIELDS if item.get(field)}:
+                    for term_key in postings(item):
+                        batch.delete_item(Key={'owner_email': owner, 'term_key': term_key})
+
+    def _matches(self, owner_email, token):
+        for posting in iter_items(
+            self.table.query,
+            KeyConditionExpression="owner_email = :owner AND begins_with(term_key, :token)",
+            ExpressionAttributeValues={":owner": owner_email, ":token": token},
+            ProjectionExpression="term_key"
+        ):
+            term, appointment_id, field = posting['term_key'].rsplit('#', 2)
+            yield term, appointment_id, field
+
+    def search(self, owner_email, query, page=1, page_size=20):
+        """Return (appointment_ids, total) for one page of ranked matches.
+
+        Every query token must prefix-match some indexed field. Exact token
+        matches score double, and matches are weighted by field.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term, appointment_id, field in self._matches(owner_email, token):
+                weight = SEARCH_FIELDS.get(field, 1) * (2 if term == token else 1)
+                token_scores[appointment_id] = token_scores.get(appointment_id, 0) + weight
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    appointment_id: score + token_scores[appointment_id]
+                    for appointment_id, score in scores.items()
+                    if appointment_id in token_scores
+                }
+            if not scores:
+                return [], 0
+
+        ranked = sorted(scores, key=lambda appointment_id: (-scores[appointment_id], appointment_id))
+        start = (page - 1) * page_size
+        return ranked[start:start + page_size], len(ranked)
@@ -0,0 +1,54 @@
+import time
+from decimal import Decimal
+
+# ----------------------------------------
+# Session profile cache
+# ----------------------------------------
+
+SESSION_KEY = 'profile'
+
+# Bump when the cached shape changes so old cookies are reloaded
+PROFILE_SCHEMA = 2
+
+PROFILE_FIELDS = ('name', 'age', 'gender', 'specialization', 'role')
+
+
+def _plain(value):
+    # DynamoDB returns numbers as Decimal, which the session serializer rejects
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def build_profile(user):
+    """Project a user item onto the fields authenticated pages need."""
+    profile = {field: _plain(user.get(field)) for field in PROFILE_FIELDS if user.get(field) is not None}
+    profile['email'] = user['email']
+    profile['schema'] = PROFILE_SCHEMA
+    profile['loaded_at'] = int(time.time())
+    return profile
+
+
+def store_profile(session, user):
+    """Cache a user's profile in the (signed) session cookie and return it."""
+    profile = build_profile(user)
+    session[SESSION_KEY] = profile
+    session['name'] = profile.get('name', '')
+    return profile
+
+
+def cached_profile(session, max_age):
+    """Return the session's profile if present, current-schema and fresh, else None.
+
+    The copy is only rewritten by this session's own logins and profile edits;
+    changes made elsewhere (another device, an admin import) show up once the
+    copy is older than ``max_age`` and is reloaded from UsersTable.
+    """
+    profile = session.get(SESSION_KEY)
+    if not profile or profile.get('schema') != PROFILE_SCHEMA:
+        return None
+    if profile.get('email') != session.get('email'):
+        return None
+    if time.time() - profile.get('loaded_at', 0) > max_age:
+        return None
+    return profile
@@ -0,0 +1,101 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from appointments import EXPIRES_AT_ATTR, STATUS_COMPLETED, STATUS_PENDING
+from dynamo import iter_items
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# Per-user appointment counters
+# ----------------------------------------
+# One item per doctor and per patient, keyed by email, holding pending,
+# completed and total counts plus a data_version that moves on every change.
+# Bookings and completions adjust them with ADD inside the same transaction
+# as the appointment write (see appointments.py); reconcile_stats rebuilds
+# them from the appointments table if they ever drift. Archived appointments
+# (stamped with a TTL, see archive.py) are no longer counted.
+
+STATS_FIELDS = ('pending_count', 'completed_count', 'total_count', 'data_version')
+
+
+def empty_stats():
+    return dict.fromkeys(STATS_FIELDS, 0)
+
+
+def get_stats(table, email):
+    """Return a user's counters with one get_item (zeros if none are recorded yet)."""
+    response = table.get_item(
+        Key={'email': email},
+        ProjectionExpression=', '.join(STATS_FIELDS)
+    )
+    stats = empty_stats()
+    stats.update({field: int(value) for field, value in response.get('Item', {}).items()})
+    return stats
+
+
+def _count_segment(appointments_table, segment, total_segments):
+    counts = defaultdict(Counter)
+    for item in iter_items(
+        appointments_table.scan,
+        Segment=segment,
+        TotalSegments=total_segments,
+        ProjectionExpression="doctor_email, patient_email, #s",
+        FilterExpression=f"attribute_not_exists({EXPIRES_AT_ATTR})",
+        ExpressionAttributeNames={"#s": "status"}
+    ):
+        status = item.get('status', STATUS_PENDING)
+        for email in {item.get('doctor_email'), item.get('patient_email')} - {None}:
+            counts[email]['total_count'] += 1
+            if status == STATUS_COMPLETED:
+                counts[email]['completed_count'] += 1
+            elif status == STATUS_PENDING:
+                counts[email]['pending_count'] += 1
+    return counts
+
+
+def reconcile_stats(appointments_table, stats_table, segments=4):
+    """Recount every user's appointments with a parallel scan and rewrite drifted counters.
+
+    Returns the number of stats items corrected. Bookings that land while the
+    scan runs can be counted or missed, so run it in a quiet period or run it
+    twice; counters that already match are left untouched.
+    """
+    totals = defaultdict(Counter)
+    lock = threading.Lock()
+
+    def merge(segment):
+        counts = _count_segment(appointments_table, segment, segments)
+        with lock:
+            for email, counter in counts.items():
+                totals[email].update(counter)
+
+    with ThreadPoolExecutor(max_workers=segments, thread_name_prefix='reconcile') as pool:
+        for future in [pool.submit(merge, segment) for segment in range(segments)]:
+            future.result()
+
+    # Users whose appointments have all gone still need their counters zeroed
+    for item in iter_items(stats_table.scan, ProjectionExpression='email'):
+        totals.setdefault(item['email'], Counter())
+
+    corrected = 0
+    for email, counter in totals.items():
+        expected = {field: counter[field] for field in STATS_FIELDS if field != 'data_version'}
+        current = get_stats(stats_table, email)
+        if all(current[field] == value for field, value in expected.items()):
+            continue
+        stats_table.update_item(
+            Key={'email': email},
+            UpdateExpression="SET pending_count = :p, completed_count = :c, total_count = :t ADD data_version :one",
+            ExpressionAttributeValues={
+                ':p': expected['pending_count'],
+                ':c': expected['completed_count'],
+                ':t': expected['total_count'],
+                ':one': 1
+            }
+        )
+        corrected += 1
+    logger.info(f"Reconciled appointment stats for {len(totals)} users, corrected {corrected}")
+    return corrected
@@ -0,0 +1,105 @@
+import unittest
+from types import SimpleNamespace
+
+import bulk
+
+
+class FakeTable:
+    """In-memory stand-in for the boto3 Table calls the import pipeline makes."""
+
+    def __init__(self, name, key, items=()):
+        self.name = name
+        self.key = key
+        self.items = {item[key]: dict(item) for item in items}
+        self.meta = SimpleNamespace(client=self)
+        self.batch_gets = 0
+
+    def batch_get_item(self, RequestItems):
+        self.batch_gets += 1
+        keys = RequestItems[self.name]['Keys']
+        found = [self.items[key[self.key]] for key in keys if key[self.key] in self.items]
+        return {'Responses': {self.name: found}}
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def put_item(self, Item):
+        self.items[Item[self.key]] = Item
+
+
+USERS = [
+    {'email': 'house@clinic.test', 'name': 'Gregory House', 'role': 'doctor'},
+    {'email': 'wilson@clinic.test', 'name': 'James Wilson', 'role': 'doctor'},
+    {'email': 'ann@mail.test', 'name': 'Ann Patient', 'role': 'patient'},
+]
+
+
+def row(appointment_id, doctor='house@clinic.test', patient='ann@mail.test', **extra):
+    record = {'appointment_id': appointment_id, 'doctor_email': doctor, 'patient_email': patient,
+              'symptoms': 'cough', 'appointment_date': '2026-01-05T09:00'}
+    record.update(extra)
+    return record
+
+
+class ImportAppointmentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.users = FakeTable('Users', 'email', USERS)
+        self.appointments = FakeTable('Appointments', 'appointment_id')
+
+    def run_import(self, records, **kwargs):
+        return bulk.import_appointments(self.appointments, self.users, records, workers=1, **kwargs)
+
+    def test_names_come_from_the_user_records(self):
+        stats = self.run_import([row('a1', doctor='HOUSE@clinic.test', doctor_name='Dr Who', patient_name='')])
+
+        self.assertEqual((stats['written'], stats['rejected']), (1, 0))
+        item = self.appointments.items['a1']
+        self.assertEqual(item['doctor_email'], 'house@clinic.test')
+        self.assertEqual(item['doctor_name'], 'Gregory House')
+        self.assertEqual(item['patient_name'], 'Ann Patient')
+
+    def test_unknown_doctor_is_rejected(self):
+        stats = self.run_import([row('a1', doctor='nobody@clinic.test'), row('a2')])
+
+        self.assertEqual((stats['written'], stats['rejected'], stats['skipped']), (1, 1, 0))
+        self.assertEqual(set(self.appointments.items), {'a2'})
+
+    def test_doctor_without_the_doctor_role_is_rejected(self):
+        stats = self.run_import([row('a1', doctor='ann@mail.test')])
+
+        self.assertEqual((stats['written'], stats['rejected']), (0, 1))
+        self.assertEqual(self.appointments.items, {})
+
+    def test_unknown_patient_is_rejected(self):
+        stats = self.run_import([row('a1', patient='ghost@mail.test'), row('a2', doctor='wilson@clinic.test')])
+
+        self.assertEqual((stats['written'], stats['rejected'], stats['skipped']), (1, 1, 0))
+        self.assertEqual(set(self.appointments.items), {'a2'})
+
+    def test_users_are_read_with_one_batch_get_per_chunk(self):
+        records = [row(f"a{i}", doctor=('house@clinic.test', 'wilson@clinic.test')[i % 2]) for i in range(6)]
+
+        stats = self.run_import(records, chunk_size=3)
+
+        self.assertEqual(stats['written'], 6)
+        self.assertEqual(self.users.batch_gets, 2)
+
+    def test_rejected_rows_do_not_claim_a_slot(self):
+        slots = FakeTable('Slots', 'slot_id')
+        records = [row('a1', patient='ghost@mail.test'), row('a2')]
+
+        stats = self.run_import(records, slots_table=slots)
+
+        self.assertEqual((stats['written'], stats['rejected'], stats['skipped']), (1, 1, 0))
+        self.assertEqual([slot['appointment_id'] for slot in slots.items.values()], ['a2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+
+from werkzeug.security import generate_password_hash
+
+from hashing import HashingBusy, PasswordHasher
+
+
+def slow_hash(seconds):
+    time.sleep(seconds)
+    return 'done'
+
+
+class NeedsRehashTest(unittest.TestCase):
+
+    def test_short_method_names_match_their_expanded_hashes(self):
+        for method in ('pbkdf2:sha256:1000', 'pbkdf2:sha256', 'pbkdf2', 'scrypt', 'scrypt:16384:8:1'):
+            hasher = PasswordHasher(method=method, workers=0)
+            stored = generate_password_hash('secret', method=method)
+            self.assertFalse(hasher.needs_rehash(stored), method)
+
+    def test_full_method_names(self):
+        hasher = PasswordHasher(method='pbkdf2:sha256:2000', workers=0)
+        self.assertFalse(hasher.needs_rehash(generate_password_hash('secret', method='pbkdf2:sha256:2000')))
+        self.assertTrue(hasher.needs_rehash(generate_password_hash('secret', method='pbkdf2:sha256:1000')))
+        self.assertTrue(hasher.needs_rehash(generate_password_hash('secret', method='scrypt:16384:8:1')))
+
+    def test_cost_change_behind_a_short_name(self):
+        hasher = PasswordHasher(method='scrypt', workers=0)
+        self.assertTrue(hasher.needs_rehash(generate_password_hash('secret', method='scrypt:16384:8:1')))
+
+
+class PoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, max_pending=1,
+                                     acquire_timeout=0.01, timeout=0.2)
+        self.addCleanup(self.hasher.shutdown)
+
+    def test_hash_and_verify_on_the_pool(self):
+        stored = self.hasher.hash('secret')
+        self.assertTrue(self.hasher.verify(stored, 'secret'))
+        self.assertFalse(self.hasher.verify(stored, 'wrong'))
+
+    def test_timeout_raises_hashing_busy(self):
+        with self.assertRaises(HashingBusy):
+            self.hasher._run(slow_hash, 2)
+        self.assertEqual(self.hasher.rejected, 1)
+
+    def test_saturated_pool_raises_hashing_busy(self):
+        self.hasher.hash('warm up')
+        started = threading.Event()
+
+        def occupy():
+            started.set()
+            try:
+                self.hasher._run(slow_hash, 0.5)
+            except HashingBusy:
+                pass
+
+        worker = threading.Thread(target=occupy)
+        worker.start()
+        started.wait()
+        time.sleep(0.05)
+        with self.assertRaises(HashingBusy):
+            self.hasher.hash('secret')
+        worker.join()
+        self.assertGreaterEqual(self.hasher.rejected, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
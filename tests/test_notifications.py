@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+import socketserver
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from notifications import NotificationOutbox
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        accepted = 0
+        self.reply('220 stub ESMTP')
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stub')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip('<> ')
+                self.reply('550 No such user' if address in server.refused else '250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in self.rfile:
+                    if data.rstrip(b'\r\n') == b'.':
+                        break
+                    lines.append(data)
+                with server.lock:
+                    if server.transient_failures:
+                        server.transient_failures -= 1
+                        self.reply('451 Try again later')
+                        continue
+                    server.messages.append(b''.join(lines).decode())
+                self.reply('250 Queued')
+                accepted += 1
+                if server.drop_after and accepted >= server.drop_after:
+                    return
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server: can refuse recipients, defer messages and drop sessions."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, refused=(), transient_failures=0, drop_after=None):
+        super().__init__(('127.0.0.1', 0), SMTPStubHandler)
+        self.refused = set(refused)
+        self.transient_failures = transient_failures
+        self.drop_after = drop_after
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def settings(self):
+        return {'host': '127.0.0.1', 'port': self.server_address[1], 'sender': 'noreply@medtrack.test',
+                'starttls': False, 'timeout': 5}
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeSNS:
+    """SNS client stand-in that fails a number of publishes, or blocks until released."""
+
+    def __init__(self, failures=0, block=False):
+        self.failures = failures
+        self.published = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def publish(self, TopicArn, Message, Subject):
+        self.entered.set()
+        self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('sns unavailable')
+        self.published.append((TopicArn, Subject, Message))
+        return {'MessageId': f"msg-{len(self.published)}"}
+
+
+UNUSED_SMTP = {'host': '127.0.0.1', 'port': 1, 'sender': 'noreply@medtrack.test', 'starttls': False}
+
+
+class OutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.dead_letter_path = os.path.join(self.tmp, 'dead-letter.jsonl')
+        self.outboxes = []
+
+    def tearDown(self):
+        for outbox in self.outboxes:
+            outbox.stop(timeout=1)
+        shutil.rmtree(self.tmp)
+
+    def outbox(self, smtp_settings=UNUSED_SMTP, sns=None, **kwargs):
+        kwargs.setdefault('base_delay', 0.01)
+        outbox = NotificationOutbox(smtp_settings, lambda: sns, topic_arn='arn:test', workers=1,
+                                    dead_letter_path=self.dead_letter_path, **kwargs)
+        self.outboxes.append(outbox)
+        return outbox
+
+    def smtp_stub(self, **kwargs):
+        stub = SMTPStub(**kwargs)
+        self.addCleanup(stub.close)
+        return stub
+
+    def dead_letters(self):
+        if not os.path.exists(self.dead_letter_path):
+            return []
+        with open(self.dead_letter_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_failed_publish_is_retried_with_exponential_backoff(self):
+        sns = FakeSNS(failures=3)
+        outbox = self.outbox(sns=sns, base_delay=0.01, max_delay=0.03)
+        bounds = []
+
+        with mock.patch('notifications.random.uniform', side_effect=lambda low, high: bounds.append(high) or 0):
+            self.assertTrue(outbox.publish('hello', 'Reminder'))
+            self.assertTrue(outbox.join(5))
+
+        self.assertEqual(bounds, [0.01, 0.02, 0.03])
+        self.assertEqual(sns.published, [('arn:test', 'Reminder', 'hello')])
+        self.assertEqual(outbox.stats()['retried'], 3)
+        self.assertEqual(outbox.stats()['sent'], 1)
+        self.assertEqual(self.dead_letters(), [])
+
+    def test_deferred_email_is_retried_until_accepted(self):
+        stub = self.smtp_stub(transient_failures=2)
+        outbox = self.outbox(stub.settings)
+
+        outbox.send_email('ann@mail.test', 'Appointment booked', 'See you soon')
+        self.assertTrue(outbox.join(5))
+
+        self.assertEqual(len(stub.messages), 1)
+        self.assertEqual(outbox.stats()['retried'], 2)
+
+    def test_exhausted_job_is_dead_lettered_to_an_owner_only_file(self):
+        outbox = self.outbox(sns=FakeSNS(failures=10), max_attempts=2)
+
+        with self.assertLogs('medtrack.deadletter') as logs:
+            outbox.publish('diagnosis: flu', 'Diagnosis ready')
+            self.assertTrue(outbox.join(5))
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.dead_letter_path).st_mode), 0o600)
+        [record] = self.dead_letters()
+        self.assertEqual((record['message'], record['attempt']), ('diagnosis: flu', 2))
+        self.assertIn('sns unavailable', record['reason'])
+        # The log names the job but never carries the body
+        self.assertNotIn('diagnosis: flu', '\n'.join(logs.output))
+
+    def test_job_is_dead_lettered_when_the_queue_is_full(self):
+        sns = FakeSNS(block=True)
+        outbox = self.outbox(sns=sns, queue_size=1)
+
+        self.assertTrue(outbox.publish('first', 'Reminder'))
+        self.assertTrue(sns.entered.wait(5))
+        self.assertTrue(outbox.publish('second', 'Reminder'))
+        self.assertFalse(outbox.publish('third', 'Reminder'))
+        sns.release.set()
+        self.assertTrue(outbox.join(5))
+
+        self.assertEqual([message for _, _, message in sns.published], ['first', 'second'])
+        [record] = self.dead_letters()
+        self.assertEqual((record['message'], record['reason']), ('third', 'queue full'))
+        self.assertEqual(outbox.stats()['dead_lettered'], 1)
+
+    def test_dropped_smtp_session_is_reopened(self):
+        stub = self.smtp_stub(drop_after=1)
+        outbox = self.outbox(stub.settings)
+
+        for subject in ('first', 'second'):
+            outbox.send_email('ann@mail.test', subject, 'body')
+            self.assertTrue(outbox.join(5))
+
+        self.assertEqual(len(stub.messages), 2)
+        self.assertEqual(stub.connections, 2)
+        self.assertEqual(outbox.stats()['retried'], 0)
+
+    def test_refused_recipient_is_dead_lettered_without_retrying(self):
+        stub = self.smtp_stub(refused={'gone@mail.test'})
+        outbox = self.outbox(stub.settings)
+
+        outbox.send_email('gone@mail.test', 'Appointment booked', 'See you soon')
+        self.assertTrue(outbox.join(5))
+
+        self.assertEqual(stub.messages, [])
+        self.assertEqual(outbox.stats()['retried'], 0)
+        [record] = self.dead_letters()
+        self.assertEqual((record['to'], record['attempt']), ('gone@mail.test', 1))
+        self.assertIn('550', record['reason'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+
+from cache import TTLCache
+from resilience import (
+    ERROR_MISSING_INDEX, ERROR_OTHER, ERROR_THROTTLE, ERROR_TRANSIENT, STATE_OPEN,
+    GuardedReader, ReadUnavailable, classify_error,
+)
+
+
+def client_error(code, status=400, message=''):
+    return ClientError(
+        {'Error': {'Code': code, 'Message': message}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+        'Query'
+    )
+
+
+def read_timeout():
+    return ReadTimeoutError(endpoint_url='https://dynamodb.us-east-1.amazonaws.com/')
+
+
+def failing(exc):
+    def fn():
+        raise exc
+    return fn
+
+
+class ClassifyErrorTest(unittest.TestCase):
+
+    def test_timeouts_connection_errors_and_5xx_are_transient(self):
+        for exc in (
+            read_timeout(),
+            EndpointConnectionError(endpoint_url='http://localhost:1'),
+            client_error('InternalServerError', 500),
+            client_error('ServiceUnavailable', 503),
+            client_error('SomethingNew', 502),
+        ):
+            self.assertEqual(classify_error(exc), ERROR_TRANSIENT, exc)
+
+    def test_other_classes(self):
+        self.assertEqual(classify_error(client_error('ProvisionedThroughputExceededException')), ERROR_THROTTLE)
+        self.assertEqual(classify_error(client_error('ResourceNotFoundException')), ERROR_MISSING_INDEX)
+        self.assertEqual(classify_error(client_error('ValidationException', message='bad key')), ERROR_OTHER)
+        self.assertEqual(classify_error(ValueError('bug')), ERROR_OTHER)
+
+
+class GuardedReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.reader = GuardedReader(TTLCache(ttl=60), failure_threshold=2, reset_timeout=60)
+
+    def test_read_timeout_serves_last_good_result_and_trips_breaker(self):
+        self.assertEqual(self.reader.read('index', 'key', lambda: ['a']), (['a'], False))
+
+        self.assertEqual(self.reader.read('index', 'key', failing(read_timeout())), (['a'], True))
+        self.assertEqual(self.reader.breaker('index').snapshot()['failures'], 1)
+
+        self.assertEqual(self.reader.read('index', 'key', failing(read_timeout())), (['a'], True))
+        self.assertEqual(self.reader.breaker('index').state, STATE_OPEN)
+
+        # While open, the dependency is not called at all
+        self.assertEqual(self.reader.read('index', 'key', failing(AssertionError('called'))), (['a'], True))
+
+    def test_read_timeout_without_cached_result(self):
+        with self.assertRaises(ReadUnavailable):
+            self.reader.read('index', 'key', failing(read_timeout()))
+        self.assertEqual(self.reader.breaker('index').snapshot()['failures'], 1)
+
+    def test_other_errors_propagate_without_counting(self):
+        with self.assertRaises(ValueError):
+            self.reader.read('index', 'key', failing(ValueError('bug')))
+        self.assertEqual(self.reader.breaker('index').snapshot()['failures'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import uuid
+from datetime import datetime
+
+from appointments import STATUS_COMPLETED, STATUS_PENDING, status_sort_key
+
+# ----------------------------------------
+# Record validation shared by routes and bulk import
+# ----------------------------------------
+
+USER_REQUIRED_FIELDS = ['name', 'email', 'password', 'age', 'gender', 'role']
+USER_ROLES = ('patient', 'doctor')
+
+APPOINTMENT_REQUIRED_FIELDS = ['doctor_email', 'patient_email', 'symptoms']
+APPOINTMENT_STATUSES = (STATUS_PENDING, STATUS_COMPLETED)
+
+
+def user_validation_error(record, confirm_password=True):
+    """Return the first problem with a registration record, or None if it is valid."""
+    required_fields = list(USER_REQUIRED_FIELDS)
+    if confirm_password:
+        required_fields.insert(3, 'confirm_password')
+    for field in required_fields:
+        if not record.get(field):
+            return f'Please enter {field}'
+
+    if confirm_password and record['password'] != record['confirm_password']:
+        return 'Passwords do not match'
+
+    if record['role'].lower() not in USER_ROLES:
+        return f"Invalid role: {record['role']}"
+    return None
+
+
+def build_user_item(record, password_hash):
+    """Build the UsersTable item for a validated registration record."""
+    user_data = {
+        'email': record['email'].lower(),
+        'name': record['name'],
+        'password': password_hash,
+        'age': record['age'],
+        'gender': record['gender'],
+        'role': record['role'].lower(),
+        'created_at': record.get('created_at') or datetime.utcnow().isoformat()
+    }
+    if user_data['role'] == 'doctor' and record.get('specialization'):
+        user_data['specialization'] = record['specialization']
+    return user_data
+
+
+def appointment_validation_error(record):
+    """Return the first problem with an appointment record, or None if it is valid."""
+    for field in APPOINTMENT_REQUIRED_FIELDS:
+        if not record.get(field):
+            return f'Please enter {field}'
+    status = (record.get('status') or STATUS_PENDING).lower()
+    if status not in APPOINTMENT_STATUSES:
+        return f"Invalid status: {record['status']}"
+    return None
+
+
+def appointment_users_error(record, doctor, patient):
+    """Return why an appointment record's users are unusable, or None.
+
+    ``doctor`` and ``patient`` are the UsersTable items for the record's
+    emails, or None when no such user exists.
+    """
+    if not doctor:
+        return f"Unknown doctor: {record['doctor_email']}"
+    if doctor.get('role') != 'doctor':
+        return f"Not a doctor: {record['doctor_email']}"
+    if not patient:
+        return f"Unknown patient: {record['patient_email']}"
+    return None
+
+
+def build_appointment_item(record, doctor, patient):
+    """Build the AppointmentsTable item for a validated appointment record and its users."""
+    status = (record.get('status') or STATUS_PENDING).lower()
+    appointment_date = record.get('appointment_date') or datetime.now().isoformat()
+    item = {
+        'appointment_id': record.get('appointment_id') or str(uuid.uuid4()),
+        'doctor_email': record['doctor_email'].lower(),
+        'doctor_name': doctor.get('name', 'Doctor'),
+        'patient_email': record['patient_email'].lower(),
+        'patient_name': patient.get('name', 'Patient'),
+        'symptoms': record['symptoms'],
+        'status': status,
+        'appointment_date': appointment_date,
+        'status_date': status_sort_key(status, appointment_date),
+        'created_at': record.get('created_at') or datetime.now().isoformat()
+    }
+    for field in ('diagnosis', 'treatment_plan', 'prescription', 'updated_at'):
+        if record.get(field):
+            item[field] = record[field]
+    return item